@@ -0,0 +1,516 @@
+"""
+Local stand-ins for the ZenHub, GitHub and Google Sheets APIs, serving a synthetic
+organisation of configurable size, for benchmarking zentool end to end.
+
+One HTTP server answers all three APIs:
+
+    /p1/...                                 ZenHub
+    /repos/..., /repositories/..., /graphql GitHub (the REST endpoints PyGithub uses)
+    /v4/spreadsheets/...                    Google Sheets (values.get, values.batchGet, spreadsheets.get,
+                                            batchUpdate)
+    /_stats, /_reset                        request counters for the benchmark harness
+
+Only as much of each API is implemented as zentool uses.  Every request can be delayed
+by a fixed latency to simulate a real network.
+"""
+
+import datetime
+import json
+import random
+import re
+import time
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+from urllib.parse import parse_qs, unquote, urlparse
+
+ORG = "bench"
+TRACKER_REPO_ID = 1000
+RELEASE_NAME = "Benchmark Release"
+EPOCH = datetime.datetime(2019, 1, 1)
+NUMERIC_SEGMENT_REGEX = re.compile(r"/\d+(?=/|$|:)")
+MAX_ROW_INDEX = 10000000 - 1  # Google Sheets' limit on cells, for open-ended ranges such as A1:ZZZ
+
+
+class SyntheticWorld:
+    """
+    Repos, epics, issues, releases and spreadsheets for the fake servers to serve.
+    Repo 0 is the tracker repo holding the epics; their issues are spread round-robin
+    over the other repos.
+    """
+
+    PIPELINES = ["New Issues", "Backlog", "In Progress", "Review", "Done"]
+    DEPENDENCY_FRACTION = 0.1
+
+    def __init__(self, repos=40, epics=500, issues_per_epic=50, seed=1):
+        rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.repos = dict()  # repo id -> {'full_name', 'issues': {number: issue}}
+        self.repo_ids_by_name = dict()
+        for index in range(repos):
+            repo_id = TRACKER_REPO_ID + index
+            full_name = f"{ORG}/repo{index}"
+            self.repos[repo_id] = {'full_name': full_name, 'issues': dict(), 'next_number': 1}
+            self.repo_ids_by_name[full_name] = repo_id
+
+        self.epics = dict()  # epic number -> list of (repo_id, issue_number)
+        tracker = self.repos[TRACKER_REPO_ID]
+        for _ in range(epics):
+            epic_number = self._new_issue(TRACKER_REPO_ID, "Epic", rng, closed_fraction=0.2)
+            tracker['issues'][epic_number]['is_epic'] = True
+            self.epics[epic_number] = []
+        issue_repo_ids = [repo_id for repo_id in self.repos if repo_id != TRACKER_REPO_ID] or [TRACKER_REPO_ID]
+        repo_cursor = 0
+        for epic_number in self.epics:
+            for _ in range(issues_per_epic):
+                repo_id = issue_repo_ids[repo_cursor % len(issue_repo_ids)]
+                repo_cursor += 1
+                number = self._new_issue(repo_id, "Issue", rng, closed_fraction=0.3)
+                self.epics[epic_number].append((repo_id, number))
+
+        # Each issue may be blocked by an issue created before it, so dependencies never form a cycle
+        dependency_rng = random.Random(seed)
+        issue_keys = [key for keys in self.epics.values() for key in keys]
+        self.dependencies = [  # (blocking, blocked)
+            (issue_keys[dependency_rng.randrange(index)], key)
+            for index, key in enumerate(issue_keys)
+            if index and dependency_rng.random() < self.DEPENDENCY_FRACTION
+        ]
+
+        self.releases = {1: {'release_id': 1, 'title': RELEASE_NAME, 'state': 'open', 'issues': set()}}
+        self.sheets = dict()  # spreadsheet id -> {(row, col) 0-based: cell data}
+
+    def _new_issue(self, repo_id, kind, rng, closed_fraction=0.0):
+        repo = self.repos[repo_id]
+        number = repo['next_number']
+        repo['next_number'] += 1
+        repo['issues'][number] = {
+            'title': f"{kind} {number} of {repo['full_name']}",
+            'body': f"Body of {kind.lower()} {number}",
+            'state': 'closed' if rng.random() < closed_fraction else 'open',
+            'updated_at': (EPOCH + datetime.timedelta(minutes=rng.randrange(100000))).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            'pipeline': rng.choice(self.PIPELINES),
+            'estimate': rng.choice([None, 1, 2, 3, 5, 8]),
+            'is_epic': False,
+            'comments': [],
+        }
+        return number
+
+    def create_issue(self, repo_id, title, body):
+        repo = self.repos[repo_id]
+        number = repo['next_number']
+        repo['next_number'] += 1
+        repo['issues'][number] = {
+            'title': title, 'body': body, 'state': 'open',
+            'updated_at': datetime.datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ"),
+            'pipeline': self.PIPELINES[0], 'estimate': None, 'is_epic': False, 'comments': [],
+        }
+        return number
+
+
+class FakeApiServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, world, latency=0.0):
+        super().__init__(address, FakeApiHandler)
+        self.world = world
+        self.latency = latency
+        self.counts = Counter()
+        self.bytes = Counter()
+        self.counts_lock = threading.Lock()
+
+
+class FakeApiHandler(BaseHTTPRequestHandler):
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def world(self):
+        return self.server.world
+
+    @property
+    def base_url(self):
+        return f"http://{self.headers['Host']}"
+
+    def do_GET(self):
+        self._dispatch('GET')
+
+    def do_POST(self):
+        self._dispatch('POST')
+
+    def do_PATCH(self):
+        self._dispatch('PATCH')
+
+    def _dispatch(self, method):
+        url = urlparse(self.path)
+        path = unquote(url.path)
+        query = parse_qs(url.query)
+        length = int(self.headers.get('Content-Length') or 0)
+        body = json.loads(self.rfile.read(length)) if length else None
+
+        if path == '/_stats':
+            with self.server.counts_lock:
+                stats = [{'service': service, 'endpoint': endpoint, 'count': count,
+                          'bytes': self.server.bytes[(service, endpoint)]}
+                         for (service, endpoint), count in sorted(self.server.counts.items())]
+            return self._respond(200, stats)
+        if path == '/_reset':
+            with self.server.counts_lock:
+                self.server.counts.clear()
+                self.server.bytes.clear()
+            return self._respond(200, {})
+
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        for service, pattern, route_method, handler in ROUTES:
+            match = pattern.match(path)
+            if match and method == route_method:
+                status, data = handler(self, body=body, query=query, **match.groupdict())
+                self._respond(status, data, service=service, endpoint=f"{method} {endpoint_template(path)}")
+                return
+        self._respond(404, {'message': f"No fake for {method} {path}"}, service='unknown', endpoint=f"{method} {path}")
+
+    def _respond(self, status, data, service=None, endpoint=None):
+        payload = json.dumps(data).encode()
+        if service:
+            with self.server.counts_lock:
+                self.server.counts[(service, endpoint)] += 1
+                self.server.bytes[(service, endpoint)] += len(payload)
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        if service == 'zenhub':
+            self.send_header('X-RateLimit-Limit', '100000')
+            self.send_header('X-RateLimit-Used', '0')
+            self.send_header('X-RateLimit-Reset', str(int(time.time()) + 60))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    # ZenHub
+
+    def zh_epics(self, repo_id, **_):
+        epic_issues = [{'issue_number': number, 'repo_id': int(repo_id)}
+                       for number in self.world.epics] if int(repo_id) == TRACKER_REPO_ID else []
+        return 200, {'epic_issues': epic_issues}
+
+    def zh_epic(self, repo_id, number, **_):
+        keys = self.world.epics.get(int(number)) if int(repo_id) == TRACKER_REPO_ID else None
+        if keys is None:
+            return 404, {'message': "Not found"}
+        issue = self.world.repos[TRACKER_REPO_ID]['issues'][int(number)]
+        return 200, {
+            'issues': [{'repo_id': key_repo_id, 'issue_number': key_number, 'is_epic': False}
+                       for key_repo_id, key_number in keys],
+            'pipeline': {'name': issue['pipeline']},
+        }
+
+    def zh_issue(self, repo_id, number, **_):
+        issue = self.world.repos.get(int(repo_id), {}).get('issues', {}).get(int(number))
+        if issue is None:
+            return 404, {'message': "Not found"}
+        return 200, {
+            'pipeline': {'name': issue['pipeline']},
+            'estimate': {'value': issue['estimate']} if issue['estimate'] else None,
+            'is_epic': issue['is_epic'],
+        }
+
+    def zh_board(self, repo_id, **_):
+        repo = self.world.repos.get(int(repo_id))
+        if repo is None:
+            return 404, {'message': "Not found"}
+        pipelines = {name: [] for name in SyntheticWorld.PIPELINES}
+        for number, issue in repo['issues'].items():
+            pipelines[issue['pipeline']].append({
+                'issue_number': number,
+                'estimate': {'value': issue['estimate']} if issue['estimate'] else None,
+                'position': len(pipelines[issue['pipeline']]),
+                'is_epic': issue['is_epic'],
+            })
+        return 200, {'pipelines': [{'id': str(index), 'name': name, 'issues': issues}
+                                   for index, (name, issues) in enumerate(pipelines.items())]}
+
+    def zh_dependencies(self, repo_id, **_):
+        repo_id = int(repo_id)
+        if repo_id not in self.world.repos:
+            return 404, {'message': "Not found"}
+        return 200, {'dependencies': [
+            {'blocking': {'repo_id': blocking[0], 'issue_number': blocking[1]},
+             'blocked': {'repo_id': blocked[0], 'issue_number': blocked[1]}}
+            for blocking, blocked in self.world.dependencies if repo_id in (blocking[0], blocked[0])
+        ]}
+
+    def zh_update_epic_issues(self, repo_id, number, body, **_):
+        keys = self.world.epics[int(number)]
+        with self.world.lock:
+            for issue_data in body.get('add_issues', []):
+                key = (issue_data['repo_id'], issue_data['issue_number'])
+                if key not in keys:
+                    keys.append(key)
+        return 200, {'added_issues': body.get('add_issues', []), 'removed_issues': []}
+
+    def zh_releases(self, repo_id, **_):
+        return 200, [self._release_json(release) for release in self.world.releases.values()]
+
+    def zh_release(self, release_id, **_):
+        release = self.world.releases.get(int(release_id))
+        return (200, self._release_json(release)) if release else (404, {'message': "Not found"})
+
+    def zh_release_issues(self, release_id, **_):
+        release = self.world.releases[int(release_id)]
+        return 200, [{'repo_id': repo_id, 'issue_number': number} for repo_id, number in sorted(release['issues'])]
+
+    def zh_update_release_issues(self, release_id, body, **_):
+        release = self.world.releases[int(release_id)]
+        added = []
+        with self.world.lock:
+            for issue_data in body.get('add_issues', []):
+                key = (issue_data['repo_id'], issue_data['issue_number'])
+                if key not in release['issues']:
+                    release['issues'].add(key)
+                    added.append(issue_data)
+        return 200, {'added': added, 'removed': []}
+
+    @staticmethod
+    def _release_json(release):
+        return {key: value for key, value in release.items() if key != 'issues'}
+
+    # GitHub
+
+    def gh_repo_by_name(self, full_name, **_):
+        repo_id = self.world.repo_ids_by_name.get(full_name)
+        return (200, self._repo_json(repo_id)) if repo_id else (404, {'message': "Not Found"})
+
+    def gh_repo_by_id(self, repo_id, **_):
+        return (200, self._repo_json(int(repo_id))) if int(repo_id) in self.world.repos else \
+            (404, {'message': "Not Found"})
+
+    def gh_issue(self, full_name, number, **_):
+        repo_id = self.world.repo_ids_by_name.get(full_name)
+        if not repo_id or int(number) not in self.world.repos[repo_id]['issues']:
+            return 404, {'message': "Not Found"}
+        return 200, self._issue_json(repo_id, int(number))
+
+    def gh_issues(self, full_name, query, **_):
+        repo_id = self.world.repo_ids_by_name.get(full_name)
+        if not repo_id:
+            return 404, {'message': "Not Found"}
+        state = query.get('state', ['open'])[0]
+        since = query.get('since', [None])[0]
+        issues = [
+            self._issue_json(repo_id, number)
+            for number, issue in sorted(self.world.repos[repo_id]['issues'].items())
+            if (state == 'all' or issue['state'] == state) and (not since or issue['updated_at'] >= since)
+        ]
+        return 200, issues
+
+    def gh_create_issue(self, full_name, body, **_):
+        repo_id = self.world.repo_ids_by_name[full_name]
+        with self.world.lock:
+            number = self.world.create_issue(repo_id, body['title'], body.get('body'))
+        return 201, self._issue_json(repo_id, number)
+
+    def gh_comments(self, full_name, number, **_):
+        repo_id = self.world.repo_ids_by_name[full_name]
+        return 200, self.world.repos[repo_id]['issues'][int(number)]['comments']
+
+    def gh_create_comment(self, full_name, number, body, **_):
+        repo_id = self.world.repo_ids_by_name[full_name]
+        comments = self.world.repos[repo_id]['issues'][int(number)]['comments']
+        with self.world.lock:
+            comment = {'id': len(comments) + 1, 'body': body['body'], 'user': {'login': ORG},
+                       'url': f"{self.base_url}/repos/{full_name}/issues/comments/{len(comments) + 1}"}
+            comments.append(comment)
+        return 201, comment
+
+    GRAPHQL_REPO_REGEX = re.compile(r'(r\d+): repository\(owner: "([^"]+)", name: "([^"]+)"\) \{(.*?)\} \}')
+    GRAPHQL_ISSUE_REGEX = re.compile(r'(i\d+): issue\(number: (\d+)\)')
+
+    def gh_graphql(self, body, **_):
+        data = dict()
+        for repo_alias, owner, name, issues_query in self.GRAPHQL_REPO_REGEX.findall(body['query']):
+            repo_id = self.world.repo_ids_by_name.get(f"{owner}/{name}")
+            if not repo_id:
+                data[repo_alias] = None
+                continue
+            data[repo_alias] = dict()
+            for issue_alias, number in self.GRAPHQL_ISSUE_REGEX.findall(issues_query):
+                issue = self.world.repos[repo_id]['issues'].get(int(number))
+                data[repo_alias][issue_alias] = None if issue is None else {
+                    'title': issue['title'], 'state': issue['state'].upper(),
+                    'body': issue['body'], 'updatedAt': issue['updated_at'],
+                }
+        return 200, {'data': data}
+
+    def _repo_json(self, repo_id):
+        full_name = self.world.repos[repo_id]['full_name']
+        owner, name = full_name.split('/')
+        return {
+            'id': repo_id, 'name': name, 'full_name': full_name, 'owner': {'login': owner},
+            'private': False, 'url': f"{self.base_url}/repos/{full_name}",
+            'html_url': f"https://github.com/{full_name}",
+        }
+
+    def _issue_json(self, repo_id, number):
+        full_name = self.world.repos[repo_id]['full_name']
+        issue = self.world.repos[repo_id]['issues'][number]
+        url = f"{self.base_url}/repos/{full_name}/issues/{number}"
+        return {
+            'id': repo_id * 1000000 + number, 'number': number, 'title': issue['title'], 'body': issue['body'],
+            'state': issue['state'], 'updated_at': issue['updated_at'], 'created_at': issue['updated_at'],
+            'url': url, 'comments_url': f"{url}/comments",
+            'html_url': f"https://github.com/{full_name}/issues/{number}",
+            'repository_url': f"{self.base_url}/repos/{full_name}", 'labels': [], 'user': {'login': ORG},
+            'comments': len(issue['comments']),
+        }
+
+    # Google Sheets
+
+    def sheets_values_get(self, spreadsheet_id, range_name, **_):
+        rows = self._grid_rows(spreadsheet_id, range_name)
+        values = []
+        for row in rows:
+            row_values = [formatted_value(cell_data) for cell_data in row]
+            while row_values and row_values[-1] == "":
+                row_values.pop()
+            values.append(row_values)
+        while values and not values[-1]:
+            values.pop()
+        result = {'range': range_name, 'majorDimension': 'ROWS'}
+        if values:
+            result['values'] = values
+        return 200, result
+
+    def sheets_values_batch_get(self, spreadsheet_id, query, **_):
+        value_ranges = [self.sheets_values_get(spreadsheet_id, range_name)[1] for range_name in query['ranges']]
+        return 200, {'spreadsheetId': spreadsheet_id, 'valueRanges': value_ranges}
+
+    def sheets_get(self, spreadsheet_id, query, **_):
+        range_name = query['ranges'][0]
+        (first_row, first_col), _ = parse_a1_range(range_name)
+        row_data = [{'values': row} for row in self._grid_rows(spreadsheet_id, range_name)]
+        return 200, {'sheets': [{'data': [{'startRow': first_row, 'startColumn': first_col, 'rowData': row_data}]}]}
+
+    def _grid_rows(self, spreadsheet_id, range_name):
+        """
+        :return: the cell data of range_name as a list of rows, clipped to the cells in use
+        """
+        grid = self.world.sheets.setdefault(spreadsheet_id, dict())
+        (first_row, first_col), (last_row, last_col) = parse_a1_range(range_name)
+        with self.world.lock:
+            cells = dict(grid)
+        last_row = min(last_row, max([row for row, col in cells] or [-1]))
+        last_col = min(last_col, max([col for row, col in cells] or [-1]))
+        return [
+            [cells.get((row, col), {}) for col in range(first_col, last_col + 1)]
+            for row in range(first_row, last_row + 1)
+        ]
+
+    def sheets_batch_update(self, spreadsheet_id, body, **_):
+        grid = self.world.sheets.setdefault(spreadsheet_id, dict())
+        with self.world.lock:
+            for request in body['requests']:
+                update = request['updateCells']
+                grid_range = update['range']
+                for row_offset, row in enumerate(update['rows']):
+                    for col_offset, cell_data in enumerate(row['values']):
+                        key = (grid_range['startRowIndex'] + row_offset, grid_range['startColumnIndex'] + col_offset)
+                        if cell_data:
+                            grid[key] = cell_data
+                        else:
+                            grid.pop(key, None)
+        return 200, {'spreadsheetId': spreadsheet_id, 'replies': [{} for _ in body['requests']]}
+
+
+def endpoint_template(path):
+    path = re.sub(r"^/repos/[^/]+/[^/]+", "/repos/:owner/:repo", path)
+    path = re.sub(r"^/v4/spreadsheets/[^/:]+", "/v4/spreadsheets/:id", path)
+    path = re.sub(r"/values/.*$", "/values/:range", path)
+    return NUMERIC_SEGMENT_REGEX.sub("/:id", path)
+
+
+def column_letter_to_index(letters):
+    number = 0
+    for letter in letters:
+        number = number * 26 + ord(letter) - 64
+    return number - 1
+
+
+def parse_a1_range(range_name):
+    """
+    :return: ((first_row, first_col), (last_row, last_col)), 0-based and inclusive.
+             A corner without a row number (as in A1:ZZZ) extends to MAX_ROW_INDEX.
+    """
+    corners = []
+    for address in range_name.split(':'):
+        match = re.match(r"^([A-Z]+)(\d*)$", address)
+        row = int(match.group(2)) - 1 if match.group(2) else MAX_ROW_INDEX
+        corners.append((row, column_letter_to_index(match.group(1))))
+    return corners[0], corners[-1]
+
+
+def formatted_value(cell_data):
+    """
+    What values.get would return for a cell, by default (FORMATTED_VALUE)
+    """
+    value = (cell_data or {}).get('userEnteredValue', {})
+    if 'stringValue' in value:
+        return value['stringValue']
+    if 'numberValue' in value:
+        number = value['numberValue']
+        return str(int(number)) if float(number).is_integer() else str(number)
+    if 'formulaValue' in value:
+        match = re.match(r'^=HYPERLINK\(".*","(.*)"\)$', value['formulaValue'])
+        return match.group(1) if match else value['formulaValue']
+    return ""
+
+
+ROUTES = [
+    ('zenhub', re.compile(r"^/p1/repositories/(?P<repo_id>\d+)/epics$"), 'GET', FakeApiHandler.zh_epics),
+    ('zenhub', re.compile(r"^/p1/repositories/(?P<repo_id>\d+)/epics/(?P<number>\d+)$"), 'GET', FakeApiHandler.zh_epic),
+    ('zenhub', re.compile(r"^/p1/repositories/(?P<repo_id>\d+)/epics/(?P<number>\d+)/update_issues$"), 'POST',
+     FakeApiHandler.zh_update_epic_issues),
+    ('zenhub', re.compile(r"^/p1/repositories/(?P<repo_id>\d+)/issues/(?P<number>\d+)$"), 'GET',
+     FakeApiHandler.zh_issue),
+    ('zenhub', re.compile(r"^/p1/repositories/(?P<repo_id>\d+)/board$"), 'GET', FakeApiHandler.zh_board),
+    ('zenhub', re.compile(r"^/p1/repositories/(?P<repo_id>\d+)/dependencies$"), 'GET',
+     FakeApiHandler.zh_dependencies),
+    ('zenhub', re.compile(r"^/p1/repositories/(?P<repo_id>\d+)/reports/releases$"), 'GET',
+     FakeApiHandler.zh_releases),
+    ('zenhub', re.compile(r"^/p1/reports/release/(?P<release_id>\d+)$"), 'GET', FakeApiHandler.zh_release),
+    ('zenhub', re.compile(r"^/p1/reports/release/(?P<release_id>\d+)/issues$"), 'GET',
+     FakeApiHandler.zh_release_issues),
+    ('zenhub', re.compile(r"^/p1/reports/release/(?P<release_id>\d+)/issues$"), 'PATCH',
+     FakeApiHandler.zh_update_release_issues),
+    ('github', re.compile(r"^/graphql$"), 'POST', FakeApiHandler.gh_graphql),
+    ('github', re.compile(r"^/repositories/(?P<repo_id>\d+)$"), 'GET', FakeApiHandler.gh_repo_by_id),
+    ('github', re.compile(r"^/repos/(?P<full_name>[^/]+/[^/]+)$"), 'GET', FakeApiHandler.gh_repo_by_name),
+    ('github', re.compile(r"^/repos/(?P<full_name>[^/]+/[^/]+)/issues$"), 'GET', FakeApiHandler.gh_issues),
+    ('github', re.compile(r"^/repos/(?P<full_name>[^/]+/[^/]+)/issues$"), 'POST', FakeApiHandler.gh_create_issue),
+    ('github', re.compile(r"^/repos/(?P<full_name>[^/]+/[^/]+)/issues/(?P<number>\d+)$"), 'GET',
+     FakeApiHandler.gh_issue),
+    ('github', re.compile(r"^/repos/(?P<full_name>[^/]+/[^/]+)/issues/(?P<number>\d+)/comments$"), 'GET',
+     FakeApiHandler.gh_comments),
+    ('github', re.compile(r"^/repos/(?P<full_name>[^/]+/[^/]+)/issues/(?P<number>\d+)/comments$"), 'POST',
+     FakeApiHandler.gh_create_comment),
+    ('sheets', re.compile(r"^/v4/spreadsheets/(?P<spreadsheet_id>[^/:]+)/values/(?P<range_name>[^/]+)$"), 'GET',
+     FakeApiHandler.sheets_values_get),
+    ('sheets', re.compile(r"^/v4/spreadsheets/(?P<spreadsheet_id>[^/:]+)/values:batchGet$"), 'GET',
+     FakeApiHandler.sheets_values_batch_get),
+    ('sheets', re.compile(r"^/v4/spreadsheets/(?P<spreadsheet_id>[^/:]+)$"), 'GET', FakeApiHandler.sheets_get),
+    ('sheets', re.compile(r"^/v4/spreadsheets/(?P<spreadsheet_id>[^/:]+):batchUpdate$"), 'POST',
+     FakeApiHandler.sheets_batch_update),
+]
+
+
+def serve(world_size, latency, port_queue):
+    """
+    Build a SyntheticWorld and serve it until killed.  The chosen port is put on port_queue.
+    Intended to be the target of a multiprocessing.Process.
+    """
+    server = FakeApiServer(('127.0.0.1', 0), SyntheticWorld(**world_size), latency=latency)
+    port_queue.put(server.server_address[1])
+    server.serve_forever()
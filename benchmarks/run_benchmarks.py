@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+End-to-end benchmark of zentool commands against local stand-in ZenHub, GitHub and
+Google Sheets servers (see fake_servers.py), reporting wall time, requests made and
+peak Python memory for each command.
+
+    python benchmarks/run_benchmarks.py --repos 40 --epics 500 --issues-per-epic 50 --latency-ms 20
+
+Commands are run in this order, each building on the sheet left by the previous one:
+
+    make            dump the epics into a blank sheet
+    sync            fill in issue links and colours
+    create-issues   create an issue wherever the previous step left a 🛠
+    release         assign the issues of the first 30 epics to a release
+
+Options such as --jobs, --only-changed, --graphql and --async are passed through to the
+commands, so the same workload can be compared with and without them.
+"""
+
+import argparse
+import contextlib
+import io
+import multiprocessing
+import os
+import sys
+import time
+import tracemalloc
+from urllib.parse import quote
+
+import aiohttp  # noqa: F401 imported up front, so zentool's lazy imports aren't timed as part of a command
+import github  # noqa: F401
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import fake_servers  # noqa: E402
+from zentool.lib.combo import Combo  # noqa: E402
+from zentool.lib.google_sheet import GoogleSheet  # noqa: E402
+from zentool.lib.sheet_range import SheetRange  # noqa: E402
+from zentool.tools.issue_creator import IssueCreator  # noqa: E402
+from zentool.tools.make_spreadsheet import MakeSpreadsheet  # noqa: E402
+from zentool.tools.release_assigner import ReleaseAssigner  # noqa: E402
+from zentool.tools.spreadsheet_tools import SpreadsheetTools  # noqa: E402
+from zentool.tools.sync_spreadsheet import SyncSpreadsheet  # noqa: E402
+
+SPREADSHEET_ID = "benchmark-sheet"
+COMMANDS = ['make', 'sync', 'create-issues', 'release']
+
+
+class FakeSheetsService:
+    """
+    Just enough of googleapiclient's Sheets service to drive GoogleSheet against the fake server
+    """
+
+    class Request:
+        def __init__(self, function):
+            self.function = function
+
+        def execute(self):
+            return self.function()
+
+    def __init__(self, endpoint):
+        self.endpoint = f"{endpoint}/v4/spreadsheets"
+        self.session = requests.Session()
+
+    def spreadsheets(self):
+        return self
+
+    def values(self):
+        return self
+
+    def get(self, spreadsheetId, range=None, ranges=None, includeGridData=False, fields=None):
+        if range is not None:
+            url = f"{self.endpoint}/{spreadsheetId}/values/{quote(range)}"
+            return self.Request(lambda: self._call('GET', url))
+        url = f"{self.endpoint}/{spreadsheetId}"
+        params = {'ranges': ranges, 'includeGridData': str(includeGridData).lower(), 'fields': fields}
+        return self.Request(lambda: self._call('GET', url, params=params))
+
+    def batchGet(self, spreadsheetId, ranges, valueRenderOption=None):
+        url = f"{self.endpoint}/{spreadsheetId}/values:batchGet"
+        params = {'ranges': ranges, 'valueRenderOption': valueRenderOption}
+        return self.Request(lambda: self._call('GET', url, params=params))
+
+    def batchUpdate(self, spreadsheetId, body):
+        return self.Request(lambda: self._call('POST', f"{self.endpoint}/{spreadsheetId}:batchUpdate", json=body))
+
+    def _call(self, method, url, **kwargs):
+        response = self.session.request(method, url, **kwargs)
+        response.raise_for_status()
+        return response.json()
+
+
+class BenchmarkTools(SpreadsheetTools):
+    """
+    SpreadsheetTools wired to the fake servers, without the Google credentials check
+    """
+
+    def __init__(self, combo, sheet):
+        self.combo = combo
+        self.sheet = sheet
+
+
+class Benchmark:
+
+    def __init__(self, args, endpoint):
+        self.args = args
+        self.endpoint = endpoint
+        self.tracker_repo_name = f"{fake_servers.ORG}/repo0"
+
+    def run(self):
+        results = []
+        for command in COMMANDS:
+            if command in self.args.commands:
+                results.append((command,) + self._measure(command))
+        self._report(results)
+
+    def _new_tools(self):
+        combo = Combo(gh_token="benchmark", zh_token="benchmark", use_graphql=self.args.graphql,
+                      gh_api_endpoint=self.endpoint, zh_api_endpoint=self.endpoint)
+        sheet = GoogleSheet(SPREADSHEET_ID, service=FakeSheetsService(self.endpoint))
+        return BenchmarkTools(combo=combo, sheet=sheet)
+
+    def _command_args(self, **kwargs):
+        defaults = dict(repo_name=self.tracker_repo_name, spreadsheet_id=SPREADSHEET_ID, epic_id=None,
+                        jobs=self.args.jobs, only_changed=self.args.only_changed, use_async=self.args.use_async,
+                        incremental=False, blocked=self.args.blocked)
+        defaults.update(kwargs)
+        return argparse.Namespace(**defaults)
+
+    def _run_command(self, command, tools):
+        if command == 'make':
+            MakeSpreadsheet(tools=tools).run(self._command_args(subcommand='make'))
+        elif command == 'sync':
+            SyncSpreadsheet(tools=tools).run(self._command_args(subcommand='sync'))
+        elif command == 'create-issues':
+            IssueCreator(tools=tools).run(self._command_args(subcommand='create-issues'))
+        elif command == 'release':
+            epic_count = min(self.args.release_epics, self.args.epics)
+            epic_ids = ",".join(str(number) for number in range(1, epic_count + 1))
+            ReleaseAssigner(combo=tools.combo).run(self._command_args(
+                epic_ids=epic_ids, release_name=fake_servers.RELEASE_NAME, sheet=None))
+
+    def _measure(self, command):
+        tools = self._new_tools()
+        if command == 'create-issues':
+            self._mark_cells_for_issue_creation(tools.sheet)
+        requests.post(f"{self.endpoint}/_reset")
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            self._run_command(command, tools)
+        wall = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        stats = requests.get(f"{self.endpoint}/_stats").json()
+        return wall, peak, stats
+
+    def _mark_cells_for_issue_creation(self, sheet):
+        """
+        Ask for an issue in the first repo column of the first few epic rows
+        """
+        epic_rows = len(sheet.get_cells(f"A3:A{2 + self.args.create_issues}"))
+        if not epic_rows:
+            return
+        cells = SheetRange()
+        for row_number in range(3, 3 + epic_rows):
+            cells['C', row_number] = '🛠'
+        sheet.update_range(cells)
+
+    def _report(self, results):
+        print(f"{self.args.repos} repos, {self.args.epics} epics x {self.args.issues_per_epic} issues, "
+              f"{self.args.latency_ms}ms latency")
+        print(f"{'command':<15} {'wall s':>8} {'requests':>9} "
+              f"{'zenhub':>7} {'github':>7} {'sheets':>7} {'peak MiB':>9}")
+        for command, wall, peak, stats in results:
+            by_service = {service: sum(stat['count'] for stat in stats if stat['service'] == service)
+                          for service in ('zenhub', 'github', 'sheets')}
+            total = sum(stat['count'] for stat in stats)
+            print(f"{command:<15} {wall:>8.2f} {total:>9} {by_service['zenhub']:>7} {by_service['github']:>7} "
+                  f"{by_service['sheets']:>7} {peak / 2**20:>9.1f}")
+            if self.args.verbose:
+                for stat in sorted(stats, key=lambda stat: stat['count'], reverse=True):
+                    print(f"    {stat['count']:>7}  {stat['service']} {stat['endpoint']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('--repos', type=int, default=40)
+    parser.add_argument('--epics', type=int, default=500)
+    parser.add_argument('--issues-per-epic', type=int, default=50)
+    parser.add_argument('--latency-ms', type=float, default=0, help="delay added to every fake API request")
+    parser.add_argument('--commands', type=lambda value: value.split(','), default=COMMANDS,
+                        help=f"comma-separated subset of {','.join(COMMANDS)}")
+    parser.add_argument('--create-issues', type=int, default=10, help="number of 🛠 cells for create-issues")
+    parser.add_argument('--release-epics', type=int, default=30, help="number of epics to assign to the release")
+    parser.add_argument('--jobs', type=int, default=1)
+    parser.add_argument('--only-changed', action='store_true')
+    parser.add_argument('--graphql', action='store_true')
+    parser.add_argument('--async', dest='use_async', action='store_true')
+    parser.add_argument('--blocked', action='store_true', help="sync with a 'Blocked by' column")
+    parser.add_argument('-v', '--verbose', action='store_true', help="show request counts per endpoint")
+    args = parser.parse_args()
+
+    world_size = dict(repos=args.repos, epics=args.epics, issues_per_epic=args.issues_per_epic)
+    port_queue = multiprocessing.Queue()
+    server = multiprocessing.Process(target=fake_servers.serve, args=(world_size, args.latency_ms / 1000, port_queue),
+                                     daemon=True)
+    server.start()
+    try:
+        Benchmark(args, endpoint=f"http://127.0.0.1:{port_queue.get()}").run()
+    finally:
+        server.terminate()
+
+
+if __name__ == '__main__':
+    main()
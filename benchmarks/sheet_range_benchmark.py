@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: build and serialize a large SheetRange
+
+    python benchmarks/sheet_range_benchmark.py [rows] [cols]
+"""
+
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from zentool.lib.sheet_range import SheetRange, column_number_to_letter  # noqa: E402
+
+
+def main(rows=5000, cols=40):
+    tracemalloc.start()
+    start = time.perf_counter()
+    sheet_range = SheetRange()
+    for rownum in range(1, rows + 1):
+        for col_index in range(cols):
+            sheet_range[column_number_to_letter(col_index + 1), rownum] = f"=HYPERLINK(\"x\",\"{rownum}\")"
+    built = time.perf_counter()
+    built_memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    sheet_range.name
+    sheet_range.to_google_grid_range()
+    sheet_range.to_google_rows()
+    serialized = time.perf_counter()
+    sheet_range.to_array()
+    arrayed = time.perf_counter()
+
+    print(f"{rows} rows x {cols} cols")
+    print(f"  build:           {built - start:8.3f}s  ({built_memory / 2**20:.1f} MiB)")
+    print(f"  to_google_rows:  {serialized - built:8.3f}s")
+    print(f"  to_array:        {arrayed - serialized:8.3f}s")
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
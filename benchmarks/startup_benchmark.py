@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Startup-time benchmark: how long zentool takes to get as far as parsing its command line
+
+    python benchmarks/startup_benchmark.py [--runs N] [-v]
+
+Each case runs scripts/zentool in a fresh interpreter, and the median wall time of N runs
+is reported.  With -v, the slowest top-level imports of each case (from python -X importtime)
+are listed too.
+"""
+
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+SCRIPT = os.path.join(ROOT, 'scripts', 'zentool')
+
+CASES = [
+    ('--help', ['--help']),
+    ('no command', ['-z', 'token', '-g', 'token']),
+    ('comment --help', ['comment', '--help']),
+    ('spreadsheet sync --help', ['spreadsheet', 'SPREADSHEET_ID', 'sync', '--help']),
+]
+
+
+def run(args, python_args=()):
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, *python_args, SCRIPT, *args], env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, universal_newlines=True)
+    return time.perf_counter() - start, result.stderr
+
+
+def slowest_imports(args, count=5):
+    """
+    :return: [(cumulative microseconds, module)] for the slowest imports made directly by zentool's own modules
+    """
+    _, stderr = run(args, python_args=['-X', 'importtime'])
+    imports = []
+    for line in stderr.splitlines():
+        match = re.match(r"import time:\s+\d+ \|\s+(\d+) \|( *)(\S+)", line)
+        if match and len(match.group(2)) <= 3:
+            imports.append((int(match.group(1)), match.group(3)))
+    return sorted(imports, reverse=True)[:count]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('-v', '--verbose', action='store_true', help="show the slowest imports of each case")
+    args = parser.parse_args()
+
+    print(f"{'case':<26} {'median s':>9} {'min s':>7}")
+    for name, case_args in CASES:
+        times = [run(case_args)[0] for _ in range(args.runs)]
+        print(f"{name:<26} {statistics.median(times):>9.3f} {min(times):>7.3f}")
+        if args.verbose:
+            for microseconds, module in slowest_imports(case_args):
+                print(f"    {microseconds / 1000:>7.1f}ms  {module}")
+
+
+if __name__ == '__main__':
+    main()
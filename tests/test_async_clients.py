@@ -0,0 +1,220 @@
+import asyncio
+import unittest
+from unittest import mock
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from github import Github
+
+from zentool.lib.async_github import AsyncGitHub
+from zentool.lib.async_zenhub import AsyncZenHub
+from zentool.lib.zenhub import ZenHub
+
+
+class FakeApis:
+    """
+    aiohttp application serving the few ZenHub and GitHub REST endpoints the async clients use.
+    reject(path, status, times) makes the next requests for path fail with a rate-limit status.
+    """
+
+    REPO_ID = 1234
+    REPO_FULL_NAME = "org/repo"
+    EPIC_NUMBER = 10
+    ISSUES = {  # issue number -> (pipeline, estimate, title, state)
+        1: ("Backlog", 3, "First issue", "open"),
+        2: ("In Progress", None, "Second issue", "open"),
+        3: ("Done", 5, "Third issue", "closed"),
+    }
+    PIPELINES = ("Backlog", "In Progress", "Done")
+
+    def __init__(self):
+        self.requests = []  # (method, path) of every request received
+        self._rejections = dict()  # path -> list of statuses to answer its next requests with
+        self.app = web.Application(middlewares=[self._record_and_reject])
+        self.app.router.add_get('/p1/repositories/{repo_id}/board', self.zh_board)
+        self.app.router.add_get('/p1/repositories/{repo_id}/epics', self.zh_epics)
+        self.app.router.add_get('/p1/repositories/{repo_id}/epics/{number}', self.zh_epic)
+        self.app.router.add_get('/p1/repositories/{repo_id}/issues/{number}', self.zh_issue)
+        self.app.router.add_get('/repos/{owner}/{name}/issues/{number}', self.gh_issue)
+
+    def reject(self, path, status, times=1):
+        self._rejections.setdefault(path, []).extend([status] * times)
+
+    def request_count(self, path):
+        return sum(1 for method, request_path in self.requests if request_path == path)
+
+    @web.middleware
+    async def _record_and_reject(self, request, handler):
+        self.requests.append((request.method, request.path))
+        statuses = self._rejections.get(request.path)
+        if statuses:
+            return web.json_response({'message': "rate limited"}, status=statuses.pop(0))
+        return await handler(request)
+
+    def _zh_issue_data(self, number):
+        pipeline, estimate, title, state = self.ISSUES[number]
+        data = {'issue_number': number, 'is_epic': False, 'pipeline': {'name': pipeline}}
+        if estimate is not None:
+            data['estimate'] = {'value': estimate}
+        return data
+
+    async def zh_board(self, request):
+        pipelines = [
+            {'id': f"p{index}", 'name': name,
+             'issues': [dict(self._zh_issue_data(number), position=0) for number, issue in self.ISSUES.items()
+                        if issue[0] == name]}
+            for index, name in enumerate(self.PIPELINES)
+        ]
+        return web.json_response({'pipelines': pipelines})
+
+    async def zh_epics(self, request):
+        return web.json_response({'epic_issues': [{'issue_number': self.EPIC_NUMBER, 'repo_id': self.REPO_ID}]})
+
+    async def zh_epic(self, request):
+        return web.json_response({
+            'pipeline': {'name': "Backlog"},
+            'issues': [{'repo_id': self.REPO_ID, 'issue_number': number} for number in self.ISSUES],
+        })
+
+    async def zh_issue(self, request):
+        number = int(request.match_info['number'])
+        if number not in self.ISSUES:
+            raise web.HTTPNotFound()
+        return web.json_response(self._zh_issue_data(number))
+
+    async def gh_issue(self, request):
+        number = int(request.match_info['number'])
+        full_name = f"{request.match_info['owner']}/{request.match_info['name']}"
+        if full_name != self.REPO_FULL_NAME or number not in self.ISSUES:
+            return web.json_response({'message': "Not Found"}, status=404)
+        pipeline, estimate, title, state = self.ISSUES[number]
+        return web.json_response({
+            'number': number,
+            'title': title,
+            'state': state,
+            'body': f"Body of issue {number}",
+            'updated_at': "2020-01-0%dT00:00:00Z" % number,
+            'url': f"{request.url.origin()}/repos/{full_name}/issues/{number}",
+        })
+
+
+class TestAsyncClients(unittest.IsolatedAsyncioTestCase):
+    """
+    The async clients against the same server as their synchronous counterparts, which run in a worker thread
+    so the server can keep answering on the test's event loop.
+    """
+
+    async def asyncSetUp(self):
+        self.apis = FakeApis()
+        self.server = TestServer(self.apis.app)
+        await self.server.start_server()
+        self.endpoint = f"http://{self.server.host}:{self.server.port}"
+        backoff = mock.patch.object(ZenHub.RateLimit, 'BACKOFF_BASE_SECONDS', 0)
+        backoff.start()
+        self.addCleanup(backoff.stop)
+
+    async def asyncTearDown(self):
+        await self.server.close()
+
+    async def in_thread(self, function, *args):
+        return await asyncio.get_running_loop().run_in_executor(None, function, *args)
+
+    def sync_zenhub(self):
+        return ZenHub(api_token="token", api_endpoint=self.endpoint)
+
+    async def test_issues_have_the_same_pipelines_and_estimates(self):
+        def sync_issues():
+            repo = self.sync_zenhub().repository(FakeApis.REPO_ID)
+            return [repo.issue(number) for number in FakeApis.ISSUES]
+
+        expected = await self.in_thread(sync_issues)
+        async with AsyncZenHub(api_token="token", api_endpoint=self.endpoint) as zenhub:
+            repo = zenhub.repository(FakeApis.REPO_ID)
+            issues = await asyncio.gather(*[repo.issue(number) for number in FakeApis.ISSUES])
+
+        self.assertEqual([(issue.number, issue.pipeline, issue.estimate) for issue in expected],
+                         [(issue.number, issue.pipeline, issue.estimate) for issue in issues])
+        self.assertEqual([(1, "Backlog", 3), (2, "In Progress", None), (3, "Done", 5)],
+                         [(issue.number, issue.pipeline, issue.estimate) for issue in issues])
+
+    async def test_issues_answered_from_the_board_match_the_sync_client(self):
+        def sync_issues():
+            zenhub = self.sync_zenhub()
+            zenhub.board(FakeApis.REPO_ID)
+            return [zenhub.repository(FakeApis.REPO_ID).issue(number) for number in FakeApis.ISSUES]
+
+        expected = await self.in_thread(sync_issues)
+        async with AsyncZenHub(api_token="token", api_endpoint=self.endpoint) as zenhub:
+            board = await zenhub.board(FakeApis.REPO_ID)
+            repo = zenhub.repository(FakeApis.REPO_ID)
+            issues = await asyncio.gather(*[repo.issue(number) for number in FakeApis.ISSUES])
+
+        self.assertEqual([pipeline['name'] for pipeline in board.pipelines()], list(FakeApis.PIPELINES))
+        self.assertEqual([(issue.number, issue.pipeline, issue.estimate) for issue in expected],
+                         [(issue.number, issue.pipeline, issue.estimate) for issue in issues])
+        board_path = f"/p1/repositories/{FakeApis.REPO_ID}/board"
+        self.assertEqual(self.apis.request_count(board_path), 2)
+        self.assertEqual(sum(1 for method, path in self.apis.requests if '/issues/' in path), 0)
+
+    async def test_epics_match_the_sync_client(self):
+        def sync_epic():
+            repo = self.sync_zenhub().repository(FakeApis.REPO_ID)
+            return [epic.id for epic in repo.epics()], repo.epic(FakeApis.EPIC_NUMBER)
+
+        expected_ids, expected_epic = await self.in_thread(sync_epic)
+        async with AsyncZenHub(api_token="token", api_endpoint=self.endpoint) as zenhub:
+            repo = zenhub.repository(FakeApis.REPO_ID)
+            epics = await repo.epics()
+            epic = await repo.epic(FakeApis.EPIC_NUMBER)
+
+        self.assertEqual([epic.id for epic in epics], expected_ids)
+        self.assertEqual(epic.pipeline, expected_epic.pipeline)
+        self.assertEqual(epic.raw_issues(), expected_epic.raw_issues())
+
+    async def test_rate_limited_requests_are_retried(self):
+        path = f"/p1/repositories/{FakeApis.REPO_ID}/issues/1"
+        self.apis.reject(path, 403)
+        self.apis.reject(path, 429)
+        expected = await self.in_thread(lambda: self.sync_zenhub().repository(FakeApis.REPO_ID).issue(1))
+        self.assertEqual(self.apis.request_count(path), 3)
+
+        self.apis.reject(path, 429)
+        self.apis.reject(path, 403)
+        async with AsyncZenHub(api_token="token", api_endpoint=self.endpoint) as zenhub:
+            issue = await zenhub.repository(FakeApis.REPO_ID).issue(1)
+        self.assertEqual(self.apis.request_count(path), 6)
+        self.assertEqual((issue.pipeline, issue.estimate), (expected.pipeline, expected.estimate))
+
+    async def test_retries_give_up_after_max_retries(self):
+        path = f"/p1/repositories/{FakeApis.REPO_ID}/issues/1"
+        self.apis.reject(path, 429, times=ZenHub.MAX_RETRIES + 1)
+        async with AsyncZenHub(api_token="token", api_endpoint=self.endpoint) as zenhub:
+            with self.assertRaises(RuntimeError):
+                await zenhub.repository(FakeApis.REPO_ID).issue(1)
+        self.assertEqual(self.apis.request_count(path), ZenHub.MAX_RETRIES + 1)
+
+    async def test_other_errors_are_not_retried(self):
+        path = f"/p1/repositories/{FakeApis.REPO_ID}/issues/99"
+        async with AsyncZenHub(api_token="token", api_endpoint=self.endpoint) as zenhub:
+            with self.assertRaises(RuntimeError):
+                await zenhub.repository(FakeApis.REPO_ID).issue(99)
+        self.assertEqual(self.apis.request_count(path), 1)
+
+    async def test_github_issues_match_the_sync_client(self):
+        def sync_issues():
+            repo = Github(base_url=self.endpoint, lazy=True).get_repo(FakeApis.REPO_FULL_NAME)
+            return {(FakeApis.REPO_FULL_NAME, number): repo.get_issue(number).raw_data for number in FakeApis.ISSUES}
+
+        expected = await self.in_thread(sync_issues)
+        async with AsyncGitHub(api_token="token", api_endpoint=self.endpoint) as github:
+            found = await github.issues([(FakeApis.REPO_FULL_NAME, number) for number in FakeApis.ISSUES] +
+                                        [(FakeApis.REPO_FULL_NAME, "2"), (FakeApis.REPO_FULL_NAME, 99)])
+
+        self.assertEqual(set(found), set(expected))
+        for key, gh_data in found.items():
+            self.assertEqual(gh_data, {field: expected[key][field] for field in gh_data})
+        self.assertEqual(set(gh_data), {'title', 'state', 'body', 'updated_at'})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from github import GithubException
+
+from zentool.tools.commentator import Commentator
+
+
+class FakeGitHubIssue:
+    """
+    A PyGithub Issue whose create_comment() raises the given errors in turn before succeeding
+    """
+
+    def __init__(self, comments=(), errors=()):
+        self.comments = list(comments)
+        self.errors = list(errors)
+        self.attempts = 0
+
+    def get_comments(self):
+        return [SimpleNamespace(body=body) for body in self.comments]
+
+    def create_comment(self, body):
+        self.attempts += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        self.comments.append(body)
+        return SimpleNamespace(body=body)
+
+
+class TestCommentator(unittest.TestCase):
+
+    def setUp(self):
+        sleep = mock.patch('zentool.tools.commentator.time.sleep')
+        self.sleep = sleep.start()
+        self.addCleanup(sleep.stop)
+        pacing = mock.patch.object(Commentator, 'MIN_SECONDS_BETWEEN_COMMENTS', 0)
+        pacing.start()
+        self.addCleanup(pacing.stop)
+        self.commentator = Commentator(combo=None)
+
+    @staticmethod
+    def issue(status="open", **kwargs):
+        return SimpleNamespace(status=status, gh_issue=FakeGitHubIssue(**kwargs))
+
+    def retry_delays(self):
+        return [call.args[0] for call in self.sleep.call_args_list]
+
+    def test_comments_on_open_issues(self):
+        issue = self.issue(comments=["something else"])
+        self.assertEqual(self.commentator._comment_on(issue, "hello"), "commenting.")
+        self.assertEqual(issue.gh_issue.comments, ["something else", "hello"])
+
+    def test_skips_issues_already_carrying_the_comment(self):
+        issue = self.issue(comments=["hello"])
+        self.assertEqual(self.commentator._comment_on(issue, "hello"), "already has this comment, skipping.")
+        self.assertEqual(issue.gh_issue.attempts, 0)
+
+    def test_skips_closed_issues(self):
+        issue = self.issue(status="closed")
+        self.assertEqual(self.commentator._comment_on(issue, "hello"), "is closed, skipping.")
+        self.assertEqual(issue.gh_issue.attempts, 0)
+
+    def test_retries_after_retry_after(self):
+        issue = self.issue(errors=[GithubException(403, {'message': "slow down"}, {'Retry-After': "7"})])
+        self.assertEqual(self.commentator._comment_on(issue, "hello"), "commenting.")
+        self.assertEqual(issue.gh_issue.attempts, 2)
+        self.assertEqual(self.retry_delays(), [7])
+
+    def test_retries_secondary_rate_limits_and_exhausted_quota(self):
+        issue = self.issue(errors=[
+            GithubException(403, {'message': "You have exceeded a secondary rate limit"}, {}),
+            GithubException(429, {'message': "rate limited"}, {'X-RateLimit-Remaining': "0"}),
+        ])
+        self.assertEqual(self.commentator._comment_on(issue, "hello"), "commenting.")
+        self.assertEqual(issue.gh_issue.attempts, 3)
+        self.assertEqual(self.retry_delays(), [Commentator.DEFAULT_RETRY_AFTER_SECONDS] * 2)
+
+    def test_other_403s_are_not_retried(self):
+        issue = self.issue(errors=[GithubException(403, {'message': "Resource not accessible by integration"}, {})])
+        self.assertTrue(self.commentator._comment_on(issue, "hello").startswith("FAILED"))
+        self.assertEqual(issue.gh_issue.attempts, 1)
+        self.assertEqual(self.retry_delays(), [])
+
+    def test_other_errors_are_not_retried(self):
+        issue = self.issue(errors=[GithubException(422, {'message': "Validation Failed"}, {})])
+        self.assertTrue(self.commentator._comment_on(issue, "hello").startswith("FAILED"))
+        self.assertEqual(issue.gh_issue.attempts, 1)
+
+    def test_gives_up_after_max_retries(self):
+        errors = [GithubException(429, {}, {'Retry-After': "1"}) for _ in range(Commentator.MAX_RETRIES + 1)]
+        issue = self.issue(errors=errors)
+        self.assertTrue(self.commentator._comment_on(issue, "hello").startswith("FAILED"))
+        self.assertEqual(issue.gh_issue.attempts, Commentator.MAX_RETRIES + 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
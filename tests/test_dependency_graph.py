@@ -0,0 +1,121 @@
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from zentool.lib.dependency_graph import DependencyGraph
+
+
+class FakeZenHub:
+    """
+    zenhub.repository(repo_id).dependencies() answered from a dict, counting the fetches of each repo
+    """
+
+    def __init__(self, dependencies):
+        """
+        :param dependencies: dict mapping repo id to its list of (blocking, blocked) pairs
+        """
+        self.dependencies = dependencies
+        self.fetches = []
+        self.fetch_started = threading.Event()
+        self.release_fetch = threading.Event()
+        self.release_fetch.set()
+        self.failures = 0  # how many of the next fetches fail
+
+    def repository(self, repo_id):
+        return FakeZenHub.Repo(self, repo_id)
+
+    class Repo:
+        def __init__(self, zenhub, repo_id):
+            self.zenhub = zenhub
+            self.id = repo_id
+
+        def dependencies(self):
+            zenhub = self.zenhub
+            zenhub.fetches.append(self.id)
+            zenhub.fetch_started.set()
+            zenhub.release_fetch.wait()
+            if zenhub.failures:
+                zenhub.failures -= 1
+                raise RuntimeError("Unexpected response")
+            return zenhub.dependencies.get(self.id, [])
+
+
+TRACKER, COMPONENT = 1, 2
+
+
+class TestDependencyGraph(unittest.TestCase):
+
+    def graph(self, dependencies):
+        self.zenhub = FakeZenHub(dependencies)
+        return DependencyGraph(self.zenhub)
+
+    def test_chain_across_two_repos(self):
+        graph = self.graph({
+            TRACKER: [((COMPONENT, 5), (TRACKER, 1))],
+            COMPONENT: [((COMPONENT, 4), (COMPONENT, 5)), ((COMPONENT, 3), (COMPONENT, 4))],
+        })
+        self.assertEqual(graph.blocked_by((TRACKER, 1)), {(COMPONENT, 5)})
+        self.assertEqual(self.zenhub.fetches, [TRACKER])
+        self.assertEqual(graph.all_blocked_by([(TRACKER, 1)]), {(COMPONENT, 5), (COMPONENT, 4), (COMPONENT, 3)})
+        self.assertEqual(self.zenhub.fetches, [TRACKER, COMPONENT])
+        self.assertEqual(graph.critical_path([(TRACKER, 1)]),
+                         [(COMPONENT, 3), (COMPONENT, 4), (COMPONENT, 5), (TRACKER, 1)])
+
+    def test_unblocked_issues(self):
+        graph = self.graph({})
+        self.assertEqual(graph.all_blocked_by([(TRACKER, 1)]), set())
+        self.assertEqual(graph.critical_path([(TRACKER, 1)]), [(TRACKER, 1)])
+        self.assertEqual(graph.critical_path([]), [])
+
+    def test_weighted_critical_path(self):
+        # 1 is blocked by a chain of two light issues, 2 and 3, and by one heavy issue, 4
+        graph = self.graph({TRACKER: [
+            ((TRACKER, 3), (TRACKER, 2)), ((TRACKER, 2), (TRACKER, 1)), ((TRACKER, 4), (TRACKER, 1)),
+        ]})
+        estimates = {1: 1, 2: 1, 3: 1, 4: 8}
+        self.assertEqual(graph.critical_path([(TRACKER, 1)]), [(TRACKER, 3), (TRACKER, 2), (TRACKER, 1)])
+        self.assertEqual(graph.critical_path([(TRACKER, 1)], weight=lambda key: estimates[key[1]]),
+                         [(TRACKER, 4), (TRACKER, 1)])
+
+    def test_critical_path_ends_at_the_heaviest_of_keys(self):
+        graph = self.graph({TRACKER: [((TRACKER, 3), (TRACKER, 2))]})
+        self.assertEqual(graph.critical_path([(TRACKER, 1), (TRACKER, 2)]), [(TRACKER, 3), (TRACKER, 2)])
+
+    def test_cycle(self):
+        graph = self.graph({TRACKER: [
+            ((TRACKER, 2), (TRACKER, 3)), ((TRACKER, 3), (TRACKER, 2)), ((TRACKER, 3), (TRACKER, 1)),
+            ((TRACKER, 4), (TRACKER, 1)),
+        ]})
+        self.assertEqual(graph.all_blocked_by([(TRACKER, 1)]), {(TRACKER, 2), (TRACKER, 3), (TRACKER, 4)})
+        with self.assertRaises(DependencyGraph.CycleError) as raised:
+            graph.critical_path([(TRACKER, 1)])
+        self.assertEqual(raised.exception.keys, [(TRACKER, 1), (TRACKER, 2), (TRACKER, 3)])
+        self.assertIsInstance(raised.exception, RuntimeError)
+
+    def test_concurrent_loads_of_a_repo_wait_for_one_fetch(self):
+        graph = self.graph({TRACKER: [((TRACKER, 2), (TRACKER, 1))]})
+        self.zenhub.release_fetch.clear()
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = [executor.submit(graph.blocked_by, (TRACKER, 1)) for _ in range(4)]
+            self.zenhub.fetch_started.wait(timeout=5)
+            self.zenhub.release_fetch.set()
+            self.assertEqual([result.result(timeout=5) for result in results], [{(TRACKER, 2)}] * 4)
+        self.assertEqual(self.zenhub.fetches, [TRACKER])
+
+    def test_waiters_fetch_again_when_the_fetch_they_waited_for_fails(self):
+        graph = self.graph({TRACKER: [((TRACKER, 2), (TRACKER, 1))]})
+        self.zenhub.release_fetch.clear()
+        self.zenhub.failures = 1
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            first = executor.submit(graph.blocked_by, (TRACKER, 1))
+            self.zenhub.fetch_started.wait(timeout=5)
+            second = executor.submit(graph.blocked_by, (TRACKER, 1))
+            self.zenhub.release_fetch.set()
+            with self.assertRaises(RuntimeError):
+                first.result(timeout=5)
+            self.assertEqual(second.result(timeout=5), {(TRACKER, 2)})
+        self.assertEqual(self.zenhub.fetches, [TRACKER, TRACKER])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+import asyncio
+import re
+import unittest
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from zentool.lib.github_graphql import GitHubGraphQL
+
+
+class StubGraphQL:
+    """
+    aiohttp application answering the aliased repository/issue queries GitHubGraphQL sends,
+    the way GitHub does: missing repos and issues come back as null, with a NOT_FOUND error.
+    """
+
+    REPO_REGEX = re.compile(r'(r\d+): repository\(owner: "([^"]+)", name: "([^"]+)"\) \{(.*?)\} \}')
+    ISSUE_REGEX = re.compile(r'(i\d+): issue\(number: (\d+)\)')
+
+    def __init__(self, issues):
+        """
+        :param issues: dict mapping (repo full name, issue number) to title
+        """
+        self.issues = issues
+        self.queries = []
+        self.error = None  # when set, every query fails with this error
+        self.status = 200
+        self.app = web.Application()
+        self.app.router.add_post('/graphql', self.graphql)
+
+    async def graphql(self, request):
+        query = (await request.json())['query']
+        self.queries.append(query)
+        if self.status != 200:
+            return web.json_response({'message': "Bad credentials"}, status=self.status)
+        if self.error:
+            return web.json_response({'data': None, 'errors': [self.error]})
+        data = dict()
+        errors = []
+        repo_names = {full_name for full_name, number in self.issues}
+        for repo_alias, owner, name, issues_query in self.REPO_REGEX.findall(query):
+            full_name = f"{owner}/{name}"
+            if full_name not in repo_names:
+                data[repo_alias] = None
+                errors.append({'type': 'NOT_FOUND', 'path': [repo_alias], 'message': f"No repo {full_name}"})
+                continue
+            data[repo_alias] = dict()
+            for issue_alias, number in self.ISSUE_REGEX.findall(issues_query):
+                title = self.issues.get((full_name, int(number)))
+                if title is None:
+                    data[repo_alias][issue_alias] = None
+                    errors.append({'type': 'NOT_FOUND', 'path': [repo_alias, issue_alias],
+                                   'message': f"No issue {number}"})
+                    continue
+                data[repo_alias][issue_alias] = {'title': title, 'state': "OPEN", 'body': f"body {number}",
+                                                 'updatedAt': "2020-01-01T00:00:00Z"}
+        body = {'data': data}
+        if errors:
+            body['errors'] = errors
+        return web.json_response(body)
+
+
+class TestGitHubGraphQL(unittest.IsolatedAsyncioTestCase):
+    """
+    GitHubGraphQL is synchronous, so it runs in a worker thread while the stub answers on the test's event loop
+    """
+
+    async def asyncSetUp(self):
+        issues = {("org/one", number): f"one #{number}" for number in range(1, 151)}
+        issues.update({("org/two", number): f"two #{number}" for number in range(1, 31)})
+        self.stub = StubGraphQL(issues)
+        self.server = TestServer(self.stub.app)
+        await self.server.start_server()
+        self.graphql = GitHubGraphQL(api_token="token",
+                                     api_endpoint=f"http://{self.server.host}:{self.server.port}/graphql")
+
+    async def asyncTearDown(self):
+        await self.server.close()
+
+    async def issues(self, pairs):
+        return await asyncio.get_running_loop().run_in_executor(None, self.graphql.issues, pairs)
+
+    async def test_issues_are_batched_100_aliases_per_query(self):
+        pairs = [("org/one", number) for number in range(1, 151)] + [("org/two", number) for number in range(1, 31)]
+        found = await self.issues(pairs)
+        self.assertEqual(len(found), 180)
+        self.assertEqual(found[("org/two", 30)], {'title': "two #30", 'state': "open", 'body': "body 30",
+                                                  'updated_at': "2020-01-01T00:00:00Z"})
+        self.assertEqual([len(StubGraphQL.ISSUE_REGEX.findall(query)) for query in self.stub.queries], [100, 80])
+
+    async def test_duplicate_pairs_are_asked_for_once(self):
+        found = await self.issues([("org/one", 1), ("org/one", "1"), ("org/two", 2)])
+        self.assertEqual(set(found), {("org/one", 1), ("org/two", 2)})
+        self.assertEqual(len(StubGraphQL.ISSUE_REGEX.findall(self.stub.queries[0])), 2)
+
+    async def test_missing_issues_and_repos_are_left_out(self):
+        found = await self.issues([("org/one", 1), ("org/one", 999), ("org/missing", 1)])
+        self.assertEqual(set(found), {("org/one", 1)})
+
+    async def test_query_errors_are_raised(self):
+        self.stub.error = {'type': 'RATE_LIMITED', 'message': "API rate limit exceeded"}
+        with self.assertRaisesRegex(RuntimeError, "API rate limit exceeded"):
+            await self.issues([("org/one", 1)])
+
+    async def test_http_errors_are_raised(self):
+        self.stub.status = 401
+        with self.assertRaisesRegex(RuntimeError, "Unexpected response"):
+            await self.issues([("org/one", 1)])
+
+
+if __name__ == '__main__':
+    unittest.main()
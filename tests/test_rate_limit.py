@@ -0,0 +1,65 @@
+import unittest
+from unittest import mock
+
+from zentool.lib.zenhub import ZenHub
+
+
+class TestRateLimit(unittest.TestCase):
+
+    NOW = 1000000.0
+
+    def setUp(self):
+        clock = mock.patch('zentool.lib.zenhub.time.time', side_effect=lambda: self.now)
+        clock.start()
+        self.addCleanup(clock.stop)
+        self.now = self.NOW
+        self.rate_limit = ZenHub.RateLimit()
+
+    def headers(self, used, limit=3, reset_in=10):
+        return {'X-RateLimit-Limit': str(limit), 'X-RateLimit-Used': str(used),
+                'X-RateLimit-Reset': str(self.NOW + reset_in)}
+
+    def test_requests_go_while_the_window_has_room(self):
+        self.rate_limit.update(self.headers(used=1))
+        self.assertEqual([self.rate_limit.seconds_until_available() for _ in range(2)], [0, 0])
+        self.assertEqual(self.rate_limit.remaining, 0)
+
+    def test_waiters_are_spread_over_later_windows(self):
+        self.rate_limit.update(self.headers(used=3))
+        delays = [self.rate_limit.seconds_until_available() for _ in range(7)]
+        self.assertEqual(delays, [10, 10, 10, 70, 70, 70, 130])
+        self.assertEqual(self.rate_limit.remaining, 0, "window stays exhausted until it resets")
+
+    def test_waiters_count_against_the_window_they_wait_for(self):
+        self.rate_limit.update(self.headers(used=3))
+        self.assertEqual([self.rate_limit.seconds_until_available() for _ in range(2)], [10, 10])
+        self.now += 10
+        self.assertEqual(self.rate_limit.seconds_until_available(), 0)
+        self.assertEqual(self.rate_limit.seconds_until_available(), 60)
+
+    def test_headers_of_the_next_window_keep_queued_requests(self):
+        self.rate_limit.update(self.headers(used=3))
+        for _ in range(3):
+            self.rate_limit.seconds_until_available()
+        self.now += 10
+        self.rate_limit.update(self.headers(used=1, reset_in=70))
+        self.assertEqual(self.rate_limit.remaining, 0)
+
+    def test_backoff_waits_for_a_reset_still_to_come(self):
+        self.rate_limit.update(self.headers(used=3, reset_in=5))
+        self.assertEqual(self.rate_limit.backoff_seconds(0), 5)
+
+    def test_backoff_is_exponential_once_the_reset_has_passed(self):
+        self.rate_limit.update(self.headers(used=3, reset_in=5))
+        self.now += 30
+        self.assertEqual([self.rate_limit.backoff_seconds(attempt) for attempt in range(3)], [2, 4, 8])
+        self.assertEqual(self.rate_limit.backoff_seconds(10), ZenHub.RateLimit.BACKOFF_MAX_SECONDS)
+
+    def test_no_headers_no_pacing(self):
+        self.rate_limit.update({})
+        self.assertEqual(self.rate_limit.seconds_until_available(), 0)
+        self.assertEqual(self.rate_limit.backoff_seconds(1), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,36 @@
+import unittest
+from unittest import mock
+
+from zentool.tools.release_assigner import ReleaseAssigner
+
+
+class TestEpicIdsFromSheet(unittest.TestCase):
+
+    def setUp(self):
+        auth = mock.patch('zentool.tools.spreadsheet_tools.SpreadsheetTools.check_google_auth_is_configured')
+        auth.start()
+        self.addCleanup(auth.stop)
+        google_sheet = mock.patch('zentool.tools.release_assigner.GoogleSheet')
+        self.sheet = google_sheet.start().return_value
+        self.addCleanup(google_sheet.stop)
+        self.sheet.iter_rows.side_effect = \
+            lambda first_row, *args, first_window, **kwargs: enumerate(first_window, start=first_row)
+
+    def sheet_for(self, repo_full_name, epic_ids):
+        self.sheet.get_cells_batch.return_value = [
+            [['Repo:', repo_full_name], ['Epic', 'Description']],
+            [[epic_id] if epic_id else [] for epic_id in epic_ids],
+        ]
+
+    def test_epic_ids_of_the_repos_sheet(self):
+        self.sheet_for("org/tracker", ["12", "", "15"])
+        self.assertEqual(ReleaseAssigner._epic_ids_from_sheet("sheet-id", "org/tracker"), ["12", "15"])
+
+    def test_sheet_of_another_repo_is_refused(self):
+        self.sheet_for("org/other", ["12"])
+        with self.assertRaisesRegex(AssertionError, "spreadsheet is for repo org/other"):
+            ReleaseAssigner._epic_ids_from_sheet("sheet-id", "org/tracker")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from zentool.lib.response_cache import ResponseCache
+from zentool.lib.zenhub import ZenHub
+
+
+class TestResponseCache(unittest.TestCase):
+
+    ENDPOINT = "https://zenhub.example"
+    EPIC_PATH = "/p1/repositories/1/epics/2"
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.cache = ResponseCache(path=os.path.join(directory.name, "cache.sqlite"))
+        self.addCleanup(self.cache.db.close)
+
+    def zenhub(self, api_token, response):
+        zenhub = ZenHub(api_token=api_token, api_endpoint=self.ENDPOINT, cache=self.cache)
+        zenhub._request = mock.Mock(return_value=response)
+        return zenhub
+
+    def test_responses_are_cached_per_token(self):
+        alice = self.zenhub("alice-token", {'issues': ["private"]})
+        bob = self.zenhub("bob-token", {'issues': []})
+        self.assertEqual(alice.get(self.EPIC_PATH), {'issues': ["private"]})
+        self.assertEqual(bob.get(self.EPIC_PATH), {'issues': []})
+        self.assertEqual(alice.get(self.EPIC_PATH), {'issues': ["private"]})
+        self.assertEqual(alice._request.call_count, 1)
+        self.assertEqual(bob._request.call_count, 1)
+
+    def test_writes_invalidate_responses_of_every_token(self):
+        alice = self.zenhub("alice-token", {'issues': []})
+        bob = self.zenhub("bob-token", {'issues': []})
+        alice.get(self.EPIC_PATH)
+        bob.get(self.EPIC_PATH)
+        alice.post(f"{self.EPIC_PATH}/update_issues", {})
+        self.assertIsNone(self.cache.get(self.cache.key(self.ENDPOINT, self.EPIC_PATH, "alice-token"), self.EPIC_PATH))
+        self.assertIsNone(self.cache.get(self.cache.key(self.ENDPOINT, self.EPIC_PATH, "bob-token"), self.EPIC_PATH))
+
+    def test_uncacheable_paths_are_not_stored(self):
+        key = self.cache.key(self.ENDPOINT, "/p1/unknown", "token")
+        self.cache.put(key, "/p1/unknown", {'a': 1})
+        self.assertIsNone(self.cache.get(key, "/p1/unknown"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+import unittest
+
+from zentool.lib.sheet_range import SheetRange, column_letter_to_number, column_number_to_letter
+
+
+class TestColumnLetters(unittest.TestCase):
+
+    COLUMNS = [("A", 1), ("Z", 26), ("AA", 27), ("AZ", 52), ("ZZ", 702), ("AAA", 703), ("ZZZ", 18278)]
+
+    def test_letter_to_number(self):
+        for letters, number in self.COLUMNS:
+            self.assertEqual(column_letter_to_number(letters), number, letters)
+        self.assertEqual(column_letter_to_number("aa"), 27)
+
+    def test_number_to_letter(self):
+        for letters, number in self.COLUMNS:
+            self.assertEqual(column_number_to_letter(number), letters, number)
+
+    def test_round_trip(self):
+        for number in range(1, column_letter_to_number("ZZZ") + 1):
+            self.assertEqual(column_letter_to_number(column_number_to_letter(number)), number)
+
+
+class TestSheetRange(unittest.TestCase):
+
+    def test_address_forms_are_equivalent(self):
+        cells = SheetRange()
+        cells["AA", 3] = "tuple of letter and row"
+        self.assertEqual(cells[27, 3].value, "tuple of letter and row")
+        self.assertEqual(cells["AA3"].value, "tuple of letter and row")
+        cells[28, 4] = 5
+        self.assertEqual(cells["AB", 4].value, 5)
+        cells["ZZZ10"] = "=A1"
+        self.assertEqual(cells[18278, 10].type, 'formula')
+        self.assertIsNone(cells["B2"])
+
+    def test_unparseable_address(self):
+        with self.assertRaises(RuntimeError):
+            SheetRange()["3A"] = "x"
+
+    def test_bounds_and_name(self):
+        cells = SheetRange()
+        self.assertTrue(cells.is_empty)
+        cells["Z", 5] = "a"
+        cells["AB", 2] = "b"
+        cells["C", 7] = "c"
+        self.assertEqual(cells.name, "C2:AB7")
+        self.assertEqual(len(cells.to_array()), 6)
+        self.assertEqual(len(cells.to_array()[0]), column_letter_to_number("AB") - column_letter_to_number("C") + 1)
+
+    def test_cell_types(self):
+        cells = SheetRange()
+        cells["A1"] = 1
+        cells["B1"] = 1.5
+        cells["C1"] = "text"
+        self.assertEqual([cell.type for cell in cells.to_array()[0]], ['number', 'number', 'string'])
+        with self.assertRaises(RuntimeError):
+            cells["D1"] = None
+
+
+class TestChangedRanges(unittest.TestCase):
+
+    def current(self):
+        current = SheetRange()
+        for column, value in zip("ABCDEF", ["1", "2", "3", "4", "5", "6"]):
+            current[column, 3] = value
+        return current
+
+    def test_unchanged_cells_are_not_written(self):
+        cells = SheetRange()
+        for column, value in zip("ABCDEF", ["1", "2", "3", "4", "5", "6"]):
+            cells[column, 3] = value
+        self.assertEqual(cells.changed_ranges(self.current()), [])
+
+    def test_adjacent_changed_cells_make_one_run(self):
+        cells = SheetRange()
+        for column, value in zip("ABCDEF", ["1", "x", "y", "4", "z", "6"]):
+            cells[column, 3] = value
+        changed = cells.changed_ranges(self.current())
+        self.assertEqual([changed_range.name for changed_range in changed], ["B3:C3", "E3:E3"])
+        self.assertEqual([cell.value for cell in changed[0].to_array()[0]], ["x", "y"])
+
+    def test_runs_are_per_row(self):
+        cells = SheetRange()
+        cells["B", 3] = "x"
+        cells["B", 4] = "y"
+        cells["C", 4] = "z"
+        cells["C", 3] = "3"
+        changed = cells.changed_ranges(self.current())
+        self.assertEqual([changed_range.name for changed_range in changed], ["B3:B3", "B4:C4"])
+
+    def test_cells_we_leave_empty_count_as_cleared(self):
+        cells = SheetRange()
+        cells["A", 3] = "1"
+        cells["C", 3] = "3"
+        changed = cells.changed_ranges(self.current())
+        self.assertEqual([changed_range.name for changed_range in changed], ["B3:B3"])
+        self.assertIsNone(changed[0]["B3"])
+
+    def test_numbers_compare_by_value_and_colours_by_what_the_sheet_stores(self):
+        current = SheetRange.from_google_grid_data({'startRow': 0, 'rowData': [{'values': [
+            {'userEnteredValue': {'numberValue': 2.0},
+             'userEnteredFormat': {'backgroundColor': {'red': 1, 'green': 0.5, 'blue': 0}}},
+        ]}]})
+        cells = SheetRange()
+        cells["A1"] = 2
+        cells["A1"].bg = {'red': 255, 'green': 128, 'blue': 0}
+        self.assertEqual(cells.changed_ranges(current), [])
+        cells["A1"].bg = {'red': 0, 'green': 0, 'blue': 0}
+        self.assertEqual(len(cells.changed_ranges(current)), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,135 @@
+import datetime
+import io
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from types import SimpleNamespace
+
+from zentool.tools.sync_state import SyncState
+
+
+class FakeCombo:
+    """
+    Just enough of Combo for SyncState: repos whose GitHub issue listing returns the given changed issues
+    """
+
+    REPO_IDS = {"org/tracker": 1, "org/other": 2}
+
+    def __init__(self, changed=(), snapshot=None):
+        """
+        :param changed: (repo_id, issue_number) of the issues GitHub reports as changed
+        """
+        self.changed = changed
+        self.snapshot = snapshot
+        self.since = []  # the since argument of every issue listing
+
+    def repo(self, repo_name):
+        repo_id = self.REPO_IDS[repo_name]
+
+        def get_issues(state, since):
+            self.since.append(since)
+            return [SimpleNamespace(number=number) for changed_repo_id, number in self.changed
+                    if changed_repo_id == repo_id]
+
+        return SimpleNamespace(id=repo_id, full_name=repo_name, git=SimpleNamespace(get_issues=get_issues))
+
+
+def epic(number, issue_keys, repo_id=1):
+    return SimpleNamespace(number=number, repo=SimpleNamespace(id=repo_id),
+                           raw_issues=lambda: [{'repo_id': repo_id, 'issue_number': n} for repo_id, n in issue_keys])
+
+
+class TestSyncState(unittest.TestCase):
+
+    SHEET_ID = "sheet"
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def state(self):
+        with redirect_stdout(io.StringIO()):
+            return SyncState(self.SHEET_ID, directory=self.directory)
+
+    def synced(self, *epics):
+        """
+        :return: the state as saved by a complete sync of epics, reloaded as by the next run
+        """
+        state = self.state()
+        state.start_sync(FakeCombo(), ["org/tracker"])
+        for synced_epic in epics:
+            state.record_epic(synced_epic, [])
+        state.finish_sync()
+        return self.state()
+
+    def test_first_sync_syncs_everything(self):
+        state = self.state()
+        state.start_sync(FakeCombo(), ["org/tracker"])
+        self.assertFalse(state.is_unchanged(epic(10, [(1, 1)])))
+
+    def test_epic_with_nothing_changed_is_skipped(self):
+        state = self.synced(epic(10, [(1, 1), (2, 5)]))
+        state.start_sync(FakeCombo(changed=[(1, 99)]), ["org/tracker", "org/other"])
+        self.assertTrue(state.is_unchanged(epic(10, [(2, 5), (1, 1)])))
+
+    def test_issue_added_to_epic(self):
+        state = self.synced(epic(10, [(1, 1)]))
+        state.start_sync(FakeCombo(), ["org/tracker"])
+        self.assertFalse(state.is_unchanged(epic(10, [(1, 1), (2, 5)])))
+
+    def test_issue_removed_from_epic(self):
+        state = self.synced(epic(10, [(1, 1), (2, 5)]))
+        state.start_sync(FakeCombo(), ["org/tracker"])
+        self.assertFalse(state.is_unchanged(epic(10, [(1, 1)])))
+
+    def test_changed_issue_or_epic(self):
+        state = self.synced(epic(10, [(1, 1), (2, 5)]), epic(11, [(1, 2)]))
+        state.start_sync(FakeCombo(changed=[(2, 5), (1, 11)]), ["org/tracker", "org/other"])
+        self.assertFalse(state.is_unchanged(epic(10, [(1, 1), (2, 5)])))
+        self.assertFalse(state.is_unchanged(epic(11, [(1, 2)])))
+
+    def test_changes_are_asked_for_since_last_sync_with_an_overlap(self):
+        state = self.synced(epic(10, [(1, 1)]))
+        combo = FakeCombo()
+        state.start_sync(combo, ["org/tracker", "org/other"])
+        expected = datetime.datetime.utcfromtimestamp(state.last_sync) - SyncState.CLOCK_SKEW_ALLOWANCE
+        self.assertEqual(combo.since, [expected, expected])
+
+    def test_partial_sync_keeps_last_sync(self):
+        state = self.synced(epic(10, [(1, 1)]))
+        last_sync = state.last_sync
+        state.start_sync(FakeCombo(), ["org/tracker"])
+        state.finish_sync(complete=False)
+        self.assertEqual(self.state().last_sync, last_sync)
+
+    def test_snapshot_syncs_everything(self):
+        state = self.synced(epic(10, [(1, 1)]))
+        last_sync = state.last_sync
+        combo = FakeCombo(snapshot=object())
+        with redirect_stdout(io.StringIO()):
+            state.start_sync(combo, ["org/tracker"])
+        self.assertEqual(combo.since, [])
+        self.assertFalse(state.is_unchanged(epic(10, [(1, 1)])))
+        state.finish_sync()
+        self.assertEqual(self.state().last_sync, last_sync)
+
+    def test_missing_state_file(self):
+        state = self.state()
+        self.assertIsNone(state.last_sync)
+        self.assertEqual(state.epics, {})
+
+    def test_corrupt_state_file(self):
+        for contents in ["{not json", "[1, 2]", '{"epics": 3}']:
+            with open(os.path.join(self.directory, f"{self.SHEET_ID}.json"), 'w') as state_file:
+                state_file.write(contents)
+            state = self.state()
+            self.assertIsNone(state.last_sync, contents)
+            self.assertEqual(state.epics, {}, contents)
+            state.start_sync(FakeCombo(), ["org/tracker"])
+            self.assertFalse(state.is_unchanged(epic(10, [(1, 1)])), contents)
+
+
+if __name__ == '__main__':
+    unittest.main()
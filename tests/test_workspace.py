@@ -0,0 +1,85 @@
+import unittest
+from types import SimpleNamespace
+
+from zentool.lib.workspace import Workspace
+
+
+class FakeCombo:
+    """
+    Two repos, their boards, GitHub issue listings, epics and one release shared by both
+    """
+
+    HYDRATION_WORKERS = 4
+    TRACKER, COMPONENT = 1, 2
+
+    def __init__(self):
+        self.release = SimpleNamespace(id="r1", issue_keys=lambda: [(self.TRACKER, 2), (self.COMPONENT, 7)])
+        self.repos = {
+            self.TRACKER: self._repo(self.TRACKER, "org/tracker",
+                                     issues={1: "open", 2: "closed", 3: "open"},
+                                     board=[("Backlog", [(1, 3)]), ("Done", [(2, None)]), ("Review", [])],
+                                     epics={1: [(self.TRACKER, 2), (self.COMPONENT, 7)]}),
+            self.COMPONENT: self._repo(self.COMPONENT, "org/component",
+                                       issues={7: "open", 8: "open"},
+                                       board=[("Backlog", [(8, 1)]), ("In Progress", [(7, 5)])],
+                                       epics={}),
+        }
+        self.zenhub = SimpleNamespace(board=lambda repo_id, keep=True: self.repos[repo_id].board)
+
+    def _repo(self, repo_id, full_name, issues, board, epics):
+        pipelines = [{'name': name, 'issues': [{'issue_number': number, 'estimate': {'value': estimate}}
+                                               for number, estimate in board_issues]}
+                     for name, board_issues in board]
+        zen = SimpleNamespace(
+            epics=lambda: [SimpleNamespace(id=number) for number in epics],
+            epic=lambda number: SimpleNamespace(raw_issues=lambda: [
+                {'repo_id': key[0], 'issue_number': key[1]} for key in epics[int(number)]]),
+            releases=lambda: [self.release],
+        )
+        return SimpleNamespace(
+            id=repo_id, full_name=full_name, combo=self, zen=zen,
+            board=SimpleNamespace(pipelines=lambda: pipelines),
+            issues_data=lambda state: {number: {'state': issue_state, 'title': f"{full_name}#{number}"}
+                                       for number, issue_state in issues.items()},
+        )
+
+    def repo(self, repo_name_or_id):
+        return next(repo for repo in self.repos.values() if repo_name_or_id in (repo.id, repo.full_name))
+
+
+class TestWorkspace(unittest.TestCase):
+
+    TRACKER, COMPONENT = FakeCombo.TRACKER, FakeCombo.COMPONENT
+
+    def setUp(self):
+        self.workspace = Workspace(FakeCombo()).crawl(["org/tracker", "org/component", "org/tracker"])
+
+    def test_crawl_indexes_every_issue(self):
+        self.assertEqual(set(self.workspace.repos), {self.TRACKER, self.COMPONENT})
+        self.assertEqual(str(self.workspace), "Workspace(2 repos, 5 issues, 1 epics, 1 releases)")
+        entry = self.workspace.issue(self.COMPONENT, "7")
+        self.assertEqual((entry.state, entry.title, entry.pipeline, entry.estimate),
+                         ("open", "org/component#7", "In Progress", 5))
+        self.assertEqual(entry.epics, ((self.TRACKER, 1),))
+        self.assertEqual(entry.releases, ("r1",))
+        self.assertIsNone(self.workspace.issue(self.COMPONENT, 99))
+
+    def test_board_order_and_issues_missing_from_boards(self):
+        self.assertEqual(self.workspace.pipelines[self.TRACKER], ("Backlog", "Done", "Review"))
+        entry = self.workspace.issue(self.TRACKER, 3)
+        self.assertEqual((entry.state, entry.pipeline, entry.estimate), ("open", None, None))
+
+    def test_issues_filters(self):
+        def keys(**criteria):
+            return [key for key, entry in self.workspace.issues(**criteria)]
+
+        self.assertEqual(keys(repo_id=self.TRACKER), [(1, 1), (1, 2), (1, 3)])
+        self.assertEqual(keys(pipeline="Backlog"), [(1, 1), (2, 8)])
+        self.assertEqual(keys(state="closed"), [(1, 2)])
+        self.assertEqual(keys(epic=(self.TRACKER, 1)), [(1, 2), (2, 7)])
+        self.assertEqual(keys(release_id="r1", state="open"), [(2, 7)])
+        self.assertEqual(keys(repo_id=self.COMPONENT, pipeline="Backlog", state="open"), [(2, 8)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+import unittest
+from unittest import mock
+
+from zentool.lib.zenhub import ZenHub
+
+
+class TestBoards(unittest.TestCase):
+
+    def zenhub(self, **kwargs):
+        zenhub = ZenHub(api_token="token", **kwargs)
+        zenhub.get = mock.Mock(side_effect=lambda path: {'pipelines': [
+            {'name': "Backlog", 'issues': [{'issue_number': 1, 'estimate': {'value': 2}}]}]})
+        return zenhub
+
+    def board_fetches(self, zenhub, repo_count):
+        """
+        :return: how many boards are fetched when the boards of repo_count repos are used twice over
+        """
+        for repo_id in list(range(repo_count)) * 2:
+            zenhub.board(repo_id)
+        return zenhub.get.call_count
+
+    def test_boards_of_more_repos_than_max_boards_are_refetched(self):
+        self.assertEqual(self.board_fetches(self.zenhub(), ZenHub.MAX_BOARDS + 1), 2 * (ZenHub.MAX_BOARDS + 1))
+
+    def test_keep_boards_keeps_one_per_repo(self):
+        zenhub = self.zenhub()
+        zenhub.keep_boards(100)
+        self.assertEqual(self.board_fetches(zenhub, 100), 100)
+        zenhub.keep_boards(10)
+        self.assertEqual(self.board_fetches(zenhub, 100), 100, "keep_boards never lowers the limit")
+
+    def test_max_boards(self):
+        self.assertEqual(self.board_fetches(self.zenhub(max_boards=200), 150), 150)
+
+    def test_issues_are_answered_from_kept_boards(self):
+        zenhub = self.zenhub()
+        zenhub.board(5)
+        issue = zenhub.repository(5).issue(1)
+        self.assertEqual((issue.pipeline, issue.estimate), ("Backlog", 2))
+        self.assertEqual(zenhub.get.call_count, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
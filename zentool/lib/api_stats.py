@@ -0,0 +1,131 @@
+import bisect
+import json
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+
+class ApiStats:
+    """
+    Per-endpoint counters for API calls made during a run: request count, errors, bytes
+    and a latency histogram, keyed by (service, endpoint template), plus the lowest rate-limit
+    headroom seen for each service.
+
+    Endpoint templates replace numeric path segments with :id, so every epic fetch is counted
+    under "GET /p1/repositories/:id/epics/:id", which makes N+1 patterns stand out.
+
+    Requests are always counted, but anything costly to measure, like the size of a payload
+    that has to be serialized again, should only be measured when enabled is set.  Requests
+    PyGithub makes are only counted when enabled is set, as that means replacing its connection classes.
+    """
+
+    LATENCY_BUCKETS = [0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10]  # upper bounds, in seconds
+    NUMERIC_SEGMENT_REGEX = re.compile(r"/\d+(?=/|$)")
+
+    class Endpoint:
+        def __init__(self):
+            self.count = 0
+            self.errors = 0
+            self.bytes = 0
+            self.total_seconds = 0.0
+            self.max_seconds = 0.0
+            self.histogram = [0] * (len(ApiStats.LATENCY_BUCKETS) + 1)
+
+        def record(self, seconds, nbytes, error):
+            self.count += 1
+            self.errors += 1 if error else 0
+            self.bytes += nbytes
+            self.total_seconds += seconds
+            self.max_seconds = max(self.max_seconds, seconds)
+            self.histogram[bisect.bisect_left(ApiStats.LATENCY_BUCKETS, seconds)] += 1
+
+        def to_dict(self):
+            return {
+                'count': self.count,
+                'errors': self.errors,
+                'bytes': self.bytes,
+                'total_seconds': round(self.total_seconds, 4),
+                'max_seconds': round(self.max_seconds, 4),
+                'histogram': {
+                    (f"<={bound}s" if bound else "more"): count
+                    for bound, count in zip(ApiStats.LATENCY_BUCKETS + [None], self.histogram)
+                }
+            }
+
+    def __init__(self):
+        self.endpoints = dict()
+        self.rate_limits = dict()
+        self.started_at = time.time()
+        self.enabled = False
+        self._lock = threading.Lock()
+
+    @classmethod
+    def endpoint_template(cls, path):
+        return cls.NUMERIC_SEGMENT_REGEX.sub("/:id", path.split('?')[0])
+
+    def record(self, service, method, path, seconds, nbytes=0, error=False):
+        key = (service, f"{method} {self.endpoint_template(path)}")
+        with self._lock:
+            endpoint = self.endpoints.get(key)
+            if endpoint is None:
+                endpoint = self.endpoints[key] = ApiStats.Endpoint()
+            endpoint.record(seconds, nbytes, error)
+
+    @contextmanager
+    def timer(self, service, method, path):
+        """
+        Time the enclosed call.  The yielded dict may be given 'bytes' to record.
+        Exceptions are recorded as errors and re-raised.
+        """
+        measurement = {'bytes': 0}
+        start = time.perf_counter()
+        error = False
+        try:
+            yield measurement
+        except Exception:
+            error = True
+            raise
+        finally:
+            self.record(service, method, path, time.perf_counter() - start, measurement['bytes'], error)
+
+    def record_rate_limit(self, service, remaining, limit):
+        if remaining is None or limit is None:
+            return
+        with self._lock:
+            lowest = self.rate_limits.get(service)
+            if lowest is None or remaining < lowest['lowest_remaining']:
+                self.rate_limits[service] = {'lowest_remaining': remaining, 'limit': limit}
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                'wall_seconds': round(time.time() - self.started_at, 3),
+                'endpoints': [
+                    dict(service=service, endpoint=endpoint, **stats.to_dict())
+                    for (service, endpoint), stats in sorted(self.endpoints.items())
+                ],
+                'rate_limits': dict(self.rate_limits),
+            }
+
+    def write_json(self, path):
+        with open(path, 'w') as json_file:
+            json.dump(self.to_dict(), json_file, indent=2)
+
+    def summary(self):
+        data = self.to_dict()
+        lines = [f"API calls ({data['wall_seconds']}s wall time):",
+                 f"  {'count':>6} {'errors':>6} {'KiB':>9} {'total s':>9} {'mean ms':>8} {'max ms':>8}  endpoint"]
+        by_time = sorted(data['endpoints'], key=lambda endpoint: endpoint['total_seconds'], reverse=True)
+        for endpoint in by_time:
+            mean_ms = 1000 * endpoint['total_seconds'] / endpoint['count']
+            lines.append(f"  {endpoint['count']:>6} {endpoint['errors']:>6} {endpoint['bytes'] / 1024:>9.1f} "
+                         f"{endpoint['total_seconds']:>9.2f} {mean_ms:>8.0f} {1000 * endpoint['max_seconds']:>8.0f}  "
+                         f"{endpoint['service']} {endpoint['endpoint']}")
+        for service, rate_limit in sorted(data['rate_limits'].items()):
+            lines.append(f"Lowest {service} rate-limit headroom: "
+                         f"{rate_limit['lowest_remaining']}/{rate_limit['limit']} requests")
+        return "\n".join(lines)
+
+
+api_stats = ApiStats()
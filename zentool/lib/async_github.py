@@ -0,0 +1,70 @@
+import asyncio
+import json
+
+import aiohttp
+
+from .api_stats import api_stats
+
+
+class AsyncGitHub:
+    """
+    asyncio fetcher for GitHub issues through the REST API, for fanning out many lookups at once.
+    At most max_concurrency requests are in flight at once.
+
+        async with AsyncGitHub(api_token=token) as github:
+            found = await github.issues([("HumanCellAtlas/dcp", 123), ...])
+    """
+
+    DEFAULT_API_ENDPOINT = "https://api.github.com"
+    DEFAULT_MAX_CONCURRENCY = 20
+
+    def __init__(self, api_token, api_endpoint=None, max_concurrency=None):
+        self.api_token = api_token
+        self.api_endpoint = api_endpoint or AsyncGitHub.DEFAULT_API_ENDPOINT
+        self.max_concurrency = max_concurrency or self.DEFAULT_MAX_CONCURRENCY
+        self.session = None
+        self._semaphore = None
+
+    async def __aenter__(self):
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        headers = {"Accept": "application/vnd.github.v3+json"}
+        if self.api_token:
+            headers["Authorization"] = f"token {self.api_token}"
+        self.session = aiohttp.ClientSession(headers=headers)
+        return self
+
+    async def __aexit__(self, exc_type, exc, traceback):
+        await self.session.close()
+        self.session = None
+
+    async def issue(self, repo_full_name, number):
+        """
+        :return: dict with keys title, state, body and updated_at, or None if GitHub can't find the issue
+        """
+        url = f"{self.api_endpoint}/repos/{repo_full_name}/issues/{number}"
+        async with self._semaphore:
+            with api_stats.timer('github', 'GET', "/repos/:owner/:repo/issues/:id") as measurement:
+                async with self.session.get(url) as response:
+                    content = await response.read()
+                measurement['bytes'] = len(content)
+        if response.status == 404:
+            return None
+        if response.status != 200:
+            raise RuntimeError(f"Unexpected response: {response}")
+        data = json.loads(content)
+        return {
+            'title': data['title'],
+            'state': data['state'],
+            'body': data['body'],
+            'updated_at': data['updated_at'],
+        }
+
+    async def issues(self, pairs):
+        """
+        :param pairs: iterable of (repo_full_name, issue_number)
+        :return: dict mapping (repo_full_name, issue_number) to the issue() dict, in the same
+                 shape as GitHubGraphQL.issues().  Issues GitHub could not find are absent.
+        """
+        pairs = list(dict.fromkeys((full_name, int(number)) for full_name, number in pairs))
+        results = await asyncio.gather(*[self.issue(full_name, number) for full_name, number in pairs])
+        return {pair: result for pair, result in zip(pairs, results) if result is not None}
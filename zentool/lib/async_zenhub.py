@@ -0,0 +1,176 @@
+import asyncio
+import json
+
+import aiohttp
+
+from .api_stats import api_stats
+from .zenhub import ZenHub
+
+
+class AsyncZenHub:
+    """
+    asyncio version of the ZenHub binding, for fanning out many requests at once.
+
+    Mirrors ZenHub: repository(id) gives a Repo whose issue(), epics(), epic(), board()
+    and releases() are coroutines.  Issues and boards come back as ZenHub.Issue and ZenHub.Board,
+    epics and releases as subclasses of ZenHub.Epic and ZenHub.Release whose API calls are coroutines.
+    At most max_concurrency requests are in flight at once, and pacing follows the same
+    X-RateLimit-* headers as ZenHub.
+
+        async with AsyncZenHub(api_token=token) as zenhub:
+            epics = await asyncio.gather(*[zenhub.repository(repo_id).epic(n) for n in numbers])
+    """
+
+    DEFAULT_MAX_CONCURRENCY = 50
+
+    def __init__(self, api_token, api_endpoint=None, cache=None, rate_limit=None, max_concurrency=None):
+        """
+        :param rate_limit: a ZenHub.RateLimit to share with a synchronous client
+        """
+        self.api_token = api_token
+        self.api_endpoint = api_endpoint or ZenHub.DEFAULT_API_ENDPOINT
+        self.cache = cache
+        self.rate_limit = rate_limit or ZenHub.RateLimit()
+        self.max_concurrency = max_concurrency or self.DEFAULT_MAX_CONCURRENCY
+        self.session = None
+        self._semaphore = None
+        self._boards = dict()  # repo id -> Task fetching its ZenHub.Board
+
+    async def __aenter__(self):
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self.session = aiohttp.ClientSession(headers={"X-Authentication-Token": self.api_token})
+        return self
+
+    async def __aexit__(self, exc_type, exc, traceback):
+        await self.session.close()
+        self.session = None
+
+    def repository(self, repo_id):
+        return AsyncZenHub.Repo(repo_id, self)
+
+    async def board(self, repo_id):
+        """
+        A repo's board, fetched at most once, however many coroutines ask for it at the same time
+        """
+        if repo_id not in self._boards:
+            self._boards[repo_id] = asyncio.ensure_future(self.repository(repo_id).board())
+        return await self._boards[repo_id]
+
+    def loaded_board(self, repo_id):
+        """
+        :return: the repo's board if it has been fetched successfully, otherwise None
+        """
+        task = self._boards.get(repo_id)
+        if task is None or not task.done() or task.cancelled() or task.exception():
+            return None
+        return task.result()
+
+    async def release(self, release_id):
+        data = await self.get(f"/p1/reports/release/{release_id}")
+        return AsyncZenHub.Release(release_data=data, zenhub=self)
+
+    async def get(self, path):
+        if not self.cache:
+            return await self._request('GET', path)
+        key = self.cache.key(self.api_endpoint, path, self.api_token)
+        data = self.cache.get(key, path)
+        if data is None:
+            data = await self._request('GET', path)
+            self.cache.put(key, path, data)
+        return data
+
+    async def post(self, path, body):
+        self._invalidate_cache_for(path)
+        return await self._request('POST', path, body=body)
+
+    async def patch(self, path, body):
+        self._invalidate_cache_for(path)
+        return await self._request('PATCH', path, body=body)
+
+    def _invalidate_cache_for(self, path):
+        if self.cache:
+            collection_path = path.rsplit('/', 2)[0]
+            self.cache.invalidate(f"{self.api_endpoint}{collection_path}")
+
+    async def _request(self, method, path, body=None):
+        url = f"{self.api_endpoint}{path}"
+        async with self._semaphore:
+            for attempt in range(ZenHub.MAX_RETRIES + 1):
+                delay = self.rate_limit.seconds_until_available()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                with api_stats.timer('zenhub', method, path) as measurement:
+                    async with self.session.request(method, url, json=body) as response:
+                        content = await response.read()
+                measurement['bytes'] = len(content)
+                self.rate_limit.update(response.headers)
+                api_stats.record_rate_limit('zenhub', self.rate_limit.remaining, self.rate_limit.limit)
+                if response.status == 200:
+                    return json.loads(content)
+                if response.status not in ZenHub.RATE_LIMITED_STATUS_CODES or attempt == ZenHub.MAX_RETRIES:
+                    break
+                await asyncio.sleep(self.rate_limit.backoff_seconds(attempt))
+        raise RuntimeError(f"Unexpected response: {response}")
+
+    class Repo:
+        def __init__(self, repo_id, zenhub):
+            self.id = repo_id
+            self.zenhub = zenhub
+
+        def __str__(self):
+            return f"{self.__class__.__name__}[{self.id}]"
+
+        async def issue(self, issue_id):
+            board = self.zenhub.loaded_board(self.id)
+            data = board.issue_data(issue_id) if board else None
+            if data is None:
+                data = await self.zenhub.get(f"/p1/repositories/{self.id}/issues/{issue_id}")
+            return ZenHub.Issue(data, id=issue_id, repo=self)
+
+        async def epics(self):
+            epics_data = await self.zenhub.get(f"/p1/repositories/{self.id}/epics")
+            return [
+                AsyncZenHub.Epic(epic_data, id=epic_data['issue_number'], repo=self)
+                for epic_data in epics_data['epic_issues']
+            ]
+
+        async def epic(self, epic_id):
+            data = await self.zenhub.get(f"/p1/repositories/{self.id}/epics/{epic_id}")
+            return AsyncZenHub.Epic(data, id=epic_id, repo=self)
+
+        async def board(self):
+            data = await self.zenhub.get(f"/p1/repositories/{self.id}/board")
+            return ZenHub.Board(data, repo=self)
+
+        async def releases(self):
+            data = await self.zenhub.get(f"/p1/repositories/{self.id}/reports/releases")
+            return [AsyncZenHub.Release(release_data=release_data, zenhub=self.zenhub) for release_data in data]
+
+    class Release(ZenHub.Release):
+
+        async def issue_keys(self):
+            data = await self.zenhub.get(f"/p1/reports/release/{self.id}/issues")
+            return {(issue_data['repo_id'], issue_data['issue_number']) for issue_data in data}
+
+        async def add_issues(self, issues):
+            return await self.update_issues(add=[(issue.repo.id, issue.number) for issue in issues])
+
+        async def update_issues(self, add=(), remove=()):
+            return await super().update_issues(add=add, remove=remove)
+
+    class Epic(ZenHub.Epic):
+
+        async def issues(self):
+            repo_ids = dict.fromkeys(issue_data['repo_id'] for issue_data in self.data['issues'])
+            await asyncio.gather(*[self.repo.zenhub.board(repo_id) for repo_id in repo_ids])
+            return await asyncio.gather(*[
+                self.repo.zenhub.repository(issue_data['repo_id']).issue(issue_data['issue_number'])
+                for issue_data in self.data['issues']
+            ])
+
+        async def add_issues(self, issues):
+            path = f'/p1/repositories/{self.repo.id}/epics/{self.id}/update_issues'
+            body = {
+                'add_issues': [{'repo_id': issue.repo.id, 'issue_number': issue.number} for issue in issues],
+            }
+            await self.repo.zenhub.post(path, body)
@@ -1,4 +1,11 @@
-from github import Github
+import asyncio
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .api_stats import api_stats
+from .dependency_graph import DependencyGraph
+from .github_graphql import GitHubGraphQL
 from .zenhub import ZenHub
 
 
@@ -6,20 +13,164 @@ class Combo:
     """
     Aggregate both GitHub and ZenHub functionality
     ZenHub is pretty weak and needs info from GitHub
-    """
 
-    def __init__(self, gh_token, zh_token):
-        self.github = Github(login_or_token=gh_token)
-        self.zenhub = ZenHub(api_token=zh_token)
+    The PyGithub client, and the asyncio clients, are only imported and built when first needed.
+    """
 
-    def repo(self, repo_full_name):
-        return Combo.Repo(repo_full_name, self)
+    HYDRATION_WORKERS = 8
+    DEFAULT_GITHUB_API_ENDPOINT = "https://api.github.com"
+    GITHUB_PAGE_SIZE = 100  # the most GitHub allows
+
+    def __init__(self, gh_token, zh_token, zh_cache=None, use_graphql=False,
+                 gh_api_endpoint=None, zh_api_endpoint=None, snapshot=None):
+        """
+        :param use_graphql: if True, resolve issue titles and states in batches through GitHub's GraphQL API
+        :param gh_api_endpoint: GitHub API base URL, e.g. of a local stand-in server
+        :param zh_api_endpoint: ZenHub API base URL, e.g. of a local stand-in server
+        :param snapshot: a Snapshot to read all ZenHub and GitHub data from, making no API calls
+        """
+        self.gh_token = gh_token
+        self.gh_api_endpoint = gh_api_endpoint or Combo.DEFAULT_GITHUB_API_ENDPOINT
+        self.snapshot = snapshot
+        self._github = None
+        self._github_lock = threading.Lock()
+        self.graphql = GitHubGraphQL(api_token=gh_token, api_endpoint=f"{self.gh_api_endpoint}/graphql") \
+            if use_graphql and not snapshot else None
+        self.zenhub = ZenHub(api_token=zh_token, api_endpoint=zh_api_endpoint, cache=zh_cache, snapshot=snapshot)
+        self._repos = dict()  # identity map: full name and numeric id -> Combo.Repo
+        self._repos_lock = threading.Lock()
+        self.dependency_graph = DependencyGraph(self.zenhub)
+
+    @property
+    def github(self):
+        with self._github_lock:
+            if self._github is None:
+                from github import Github
+                if api_stats.enabled:  # only profiled runs swap in connection classes that count requests
+                    from .github_connections import count_github_requests
+                    count_github_requests()
+                self._github = Github(login_or_token=self.gh_token, base_url=self.gh_api_endpoint,
+                                      per_page=self.GITHUB_PAGE_SIZE)
+        return self._github
+
+    @property
+    def github_rate_limiting(self):
+        """
+        :return: (remaining, limit) of the GitHub rate limit, or (None, None) if GitHub hasn't been used
+        """
+        return self._github.rate_limiting if self._github else (None, None)
+
+    def repo(self, repo_full_name_or_id):
+        """
+        Each repo is only resolved once per Combo, whether it is asked for by full name or by id.
+        Repos are resolved outside the lock, so different repos can be resolved concurrently;
+        if two threads resolve the same repo at once, both get the one that was recorded first.
+        """
+        with self._repos_lock:
+            repo = self._repos.get(repo_full_name_or_id)
+        if repo:
+            return repo
+        repo = Combo.Repo(repo_full_name_or_id, self)
+        with self._repos_lock:
+            repo = self._repos.setdefault(repo.id, repo)
+            self._repos[repo.full_name] = repo
+            self._repos[repo_full_name_or_id] = repo
+        return repo
+
+    def hydrate_issues(self, issues, max_workers=None):
+        """
+        Fetch the GitHub side of issues (or epics): in GraphQL batches if enabled,
+        otherwise (or for anything GraphQL couldn't find) through a bounded thread pool.
+        :return: the same issues, in their original order, with their GitHub data populated
+        """
+        issues = list(issues)
+        if self.graphql:
+            self.prefetch_with_graphql(issues)
+        remaining = [issue for issue in issues if not issue.has_gh_data]
+        with ThreadPoolExecutor(max_workers=max_workers or self.HYDRATION_WORKERS) as executor:
+            for _ in executor.map(lambda issue: issue.gh_issue, remaining):
+                pass
+        return issues
+
+    def hydrate_zh_issues(self, issues, max_workers=None):
+        """
+        Fetch the ZenHub side (pipeline, estimate) of issues: the board of each repo involved,
+        then individual issues only where they are missing from their repo's board.
+        :return: the same issues, in their original order
+        """
+        issues = list(issues)
+        repo_ids = list(dict.fromkeys(issue.repo.id for issue in issues))
+        with ThreadPoolExecutor(max_workers=max_workers or self.HYDRATION_WORKERS) as executor:
+            for _ in executor.map(self.zenhub.board, repo_ids):
+                pass
+            for _ in executor.map(lambda issue: issue.zh_issue, issues):
+                pass
+        return issues
+
+    def prefetch_with_graphql(self, issues):
+        """
+        Resolve title, state and body of issues (or epics) in as few GraphQL queries as possible
+        """
+        pending = [issue for issue in issues if not issue.has_gh_data]
+        found = self.graphql.issues((issue.repo.full_name, issue.number) for issue in pending)
+        for issue in pending:
+            issue.gh_data = found.get((issue.repo.full_name, int(issue.number)))
+
+    def epics_issues(self, epics, max_workers=None):
+        """
+        Hydrate the issues of many epics in one pool.
+        :return: a list of issue lists, one per epic, in the order of epics
+        """
+        issue_lists = [epic.issues() for epic in epics]
+        self.hydrate_issues([issue for issues in issue_lists for issue in issues], max_workers=max_workers)
+        return issue_lists
+
+    def prefetch_epics(self, epics, include_issues=True):
+        """
+        Fetch GitHub data for epics, fanning out concurrent requests with asyncio.
+        With include_issues, first fetch the epics' ZenHub data, to find their issues,
+        and fetch GitHub data for all those issues too.
+        :return: the same epics
+        """
+        epics = list(epics)
+        if self.snapshot:
+            return epics
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(self._prefetch_epics(epics, include_issues))
+        finally:
+            loop.close()
+        return epics
+
+    async def _prefetch_epics(self, epics, include_issues):
+        from .async_github import AsyncGitHub
+        from .async_zenhub import AsyncZenHub
+        issues = []
+        if include_issues:
+            async with AsyncZenHub(api_token=self.zenhub.api_token, api_endpoint=self.zenhub.api_endpoint,
+                                   cache=self.zenhub.cache, rate_limit=self.zenhub.rate_limit) as zenhub:
+                missing = [epic for epic in epics if not epic.has_zh_data]
+                zh_epics = await asyncio.gather(*[zenhub.repository(epic.repo.id).epic(epic.number)
+                                                  for epic in missing])
+            for epic, zh_epic in zip(missing, zh_epics):
+                epic.zh_epic = ZenHub.Epic(zh_epic.data, id=zh_epic.id, repo=epic.repo.zen)
+            issues = [issue for epic in epics for issue in epic.issues()]
+
+        pending = [item for item in epics + issues if not item.has_gh_data]
+        async with AsyncGitHub(api_token=self.gh_token, api_endpoint=self.gh_api_endpoint) as github:
+            found = await github.issues((item.repo.full_name, item.number) for item in pending)
+        for item in pending:
+            item.gh_data = found.get((item.repo.full_name, int(item.number)))
 
     class Repo:
         def __init__(self, repo_full_name_or_id, combo):
             self.combo = combo
-            self.git = combo.github.get_repo(repo_full_name_or_id)
+            if combo.snapshot:
+                self.git = combo.snapshot.repo(repo_full_name_or_id)
+            else:
+                self.git = combo.github.get_repo(repo_full_name_or_id)
             self.zen = combo.zenhub.repository(repo_id=self.git.id)
+            self._epics = dict()  # identity map: epic number -> Combo.Epic
 
         def __str__(self):
             return f"{self.__class__.__name__} {self.full_name}"
@@ -40,30 +191,67 @@ class Combo:
             Search for issues in GH repo
             """
             gh_labels = [self.git.get_label(label) for label in labels]
-            return [Combo.Issue(repo=self, gh_issue=gh_issue) for gh_issue in self.git.get_issues(labels=gh_labels)]
+            gh_issues = list(self.git.get_issues(labels=gh_labels))
+            return [Combo.Issue(repo=self, gh_issue=gh_issue) for gh_issue in gh_issues]
+
+        def issues_data(self, state='open'):
+            """
+            GitHub data of all the repo's issues in the given state, from one paginated listing.
+            Bodies are left out, as there may be very many issues: callers needing one fetch it.
+            :return: dict mapping issue number to a dict with keys title, state and updated_at
+            """
+            if self.combo.snapshot:
+                return {number: {field: gh_data.get(field) for field in Combo.Issue.GH_DATA_FIELDS}
+                        for number, gh_data in self.combo.snapshot.issues(self.id).items()
+                        if state == 'all' or gh_data['state'] == state}
+            return {
+                gh_issue.number: {
+                    'title': gh_issue.title,
+                    'state': gh_issue.state,
+                    'updated_at': gh_issue.updated_at.strftime("%Y-%m-%dT%H:%M:%SZ") if gh_issue.updated_at else None,
+                }
+                for gh_issue in self.git.get_issues(state=state)
+            }
 
         def create_issue(self, title, body):
             gh_issue = self.git.create_issue(title, body)
             return Combo.Issue(self, gh_issue=gh_issue)
 
         def issue(self, number):
-            return Combo.Issue(number=number, repo=self)
+            return self._from_snapshot(Combo.Issue(number=number, repo=self))
 
         def epics(self):
-            return [
-                Combo.Epic(number=zh_epic.id, zh_epic=zh_epic, repo=self)
-                for zh_epic in self.zen.epics()
-            ]
+            """
+            The epic list only gives epic numbers, so the epics' own ZenHub data is still fetched on demand
+            """
+            return [self.epic(zh_epic.id) for zh_epic in self.zen.epics()]
 
         def epic(self, number):
-            return Combo.Epic(number=number, repo=self)
+            epic = self._epics.get(str(number))
+            if epic is None:
+                epic = self._epics.setdefault(str(number), self._from_snapshot(Combo.Epic(number=number, repo=self)))
+            return epic
+
+        def _from_snapshot(self, issue):
+            """
+            Fill in the GitHub side of an issue (or epic) from the snapshot, if we are working from one
+            """
+            if self.combo.snapshot:
+                issue.gh_data = self.combo.snapshot.issue(self.id, issue.number)
+            return issue
 
         def board(self):
-            data = self.combo.zenhub.get(f"/p1/repositories/{self.id}/board")
-            return ZenHub.Board(data, repo=self)
+            return self.zen.board()
 
     class Issue:
-        def __init__(self, repo, number=None, gh_issue=None, zh_issue=None):
+        """
+        Of an issue's GitHub data, only GH_DATA_FIELDS are kept, as there may be very many issues
+        """
+        __slots__ = ('_number', 'repo', '_gh_issue', '_zh_issue', '_id', '_gh_data')
+
+        GH_DATA_FIELDS = ('title', 'state', 'updated_at')
+
+        def __init__(self, repo, number=None, gh_issue=None, zh_issue=None, id=None):
             if not number and not gh_issue and not zh_issue:
                 raise RuntimeError("you must provide either number, gh_issue or zh_issue")
             self._number = number
@@ -71,6 +259,7 @@ class Combo:
             self._gh_issue = gh_issue
             self._zh_issue = zh_issue
             self._id = id
+            self._gh_data = None
 
         def __str__(self):
             return f"{self.__class__.__name__} " \
@@ -89,11 +278,34 @@ class Combo:
 
         @property
         def title(self):
-            return self.gh_issue.title
+            return self.gh_data['title'] if self.gh_data else self.gh_issue.title
 
         @property
         def status(self):
-            return self.gh_issue.state
+            return self.gh_data['state'] if self.gh_data else self.gh_issue.state
+
+        @property
+        def gh_data(self):
+            return self._gh_data
+
+        @gh_data.setter
+        def gh_data(self, gh_data):
+            if gh_data:
+                gh_data = {field: gh_data.get(field) for field in self.GH_DATA_FIELDS}
+                gh_data['state'] = sys.intern(gh_data['state'])
+            self._gh_data = gh_data
+
+        @property
+        def has_gh_data(self):
+            return bool(self.gh_data or self._gh_issue)
+
+        @property
+        def pipeline(self):
+            return self.zh_issue.pipeline
+
+        @property
+        def estimate(self):
+            return self.zh_issue.estimate
 
         @property
         def zh_issue(self):
@@ -108,11 +320,15 @@ class Combo:
             return self._gh_issue
 
     class Epic:
+        __slots__ = ('repo', '_zh_epic', '_gh_issue', 'number', 'gh_data', '_issues')
+
         def __init__(self, repo, number=None, zh_epic=None, gh_issue=None):
             self.repo = repo
             self._zh_epic = zh_epic
             self._gh_issue = gh_issue
             self.number = number
+            self.gh_data = None
+            self._issues = None
 
         def __str__(self):
             return f"{self.__class__.__name__} {self.repo.full_name}/{self.number} \"{self.title}\""
@@ -126,6 +342,15 @@ class Combo:
                 self._zh_epic = self.repo.zen.epic(self.number)
             return self._zh_epic
 
+        @zh_epic.setter
+        def zh_epic(self, zh_epic):
+            self._zh_epic = zh_epic
+            self._issues = None
+
+        @property
+        def has_zh_data(self):
+            return self._zh_epic is not None
+
         @property
         def gh_issue(self):
             if not self._gh_issue:
@@ -134,28 +359,42 @@ class Combo:
 
         @property
         def title(self):
-            return self.gh_issue.title
+            return self.gh_data['title'] if self.gh_data else self.gh_issue.title
 
         @property
         def body(self):
+            if self.gh_data and 'body' in self.gh_data:  # issues_data() listings leave bodies out
+                return self.gh_data['body']
             return self.gh_issue.body
 
+        @property
+        def has_gh_data(self):
+            return bool(self.gh_data or self._gh_issue)
+
         @property
         def pipeline(self):
             return self.zh_epic.pipeline
 
         @property
         def status(self):
-            return self.gh_issue.state
+            return self.gh_data['state'] if self.gh_data else self.gh_issue.state
 
         def raw_issues(self):
             return self.zh_epic.raw_issues()
 
-        def issues(self):
-            return [
-                self.repo.combo.repo(issue_data['repo_id']).issue(issue_data['issue_number'])
-                for issue_data in self.zh_epic.raw_issues()
-            ]
+        def issues(self, hydrate=False):
+            """
+            :param hydrate: if True, fetch the GitHub side of all issues concurrently up front
+            """
+            if self._issues is None:
+                self._issues = [
+                    self.repo.combo.repo(issue_data['repo_id']).issue(issue_data['issue_number'])
+                    for issue_data in self.zh_epic.raw_issues()
+                ]
+            if hydrate:
+                self.repo.combo.hydrate_issues(self._issues)
+            return list(self._issues)
 
         def add_issues(self, issues):
             self.zh_epic.add_issues(issues)
+            self._issues = None
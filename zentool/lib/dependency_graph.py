@@ -0,0 +1,132 @@
+import collections
+import threading
+
+
+class DependencyGraph:
+    """
+    In-memory index of ZenHub issue dependencies, across repos.
+
+    Issues are identified by (repo_id, issue_number).  A repo's dependencies are fetched
+    with one request, the first time an issue of that repo is asked about, so following a chain
+    of blockers into another repo loads that repo's dependencies too.  Queries are then answered
+    locally, in time linear in the part of the graph they touch.
+    """
+
+    class CycleError(RuntimeError):
+        def __init__(self, keys):
+            super().__init__(f"Dependency cycle among {keys}")
+            self.keys = keys  # the issues in or blocked by the cycle
+
+    def __init__(self, zenhub):
+        self.zenhub = zenhub
+        self.blockers = collections.defaultdict(set)  # issue -> issues blocking it
+        self.blocking = collections.defaultdict(set)  # issue -> issues it blocks
+        self._loaded_repo_ids = set()
+        self._loading = dict()  # repo id -> Event set when the fetch of its dependencies in progress ends
+        self._lock = threading.RLock()
+
+    def __str__(self):
+        count = sum(len(blockers) for blockers in self.blockers.values())
+        return f"{self.__class__.__name__}({count} dependencies in {len(self._loaded_repo_ids)} repos)"
+
+    def add(self, blocking, blocked):
+        with self._lock:
+            self.blockers[blocked].add(blocking)
+            self.blocking[blocking].add(blocked)
+
+    def load_repo(self, repo_id):
+        """
+        Fetch a repo's dependencies, unless they have been already.
+        The lock is only held to merge them, so different repos can be fetched concurrently,
+        while threads wanting a repo that is being fetched wait for that fetch.
+        """
+        while True:
+            with self._lock:
+                if repo_id in self._loaded_repo_ids:
+                    return
+                loading = self._loading.get(repo_id)
+                if loading is None:
+                    loading = self._loading[repo_id] = threading.Event()
+                    break
+            loading.wait()  # then check again, in case that fetch failed
+        try:
+            dependencies = self.zenhub.repository(repo_id).dependencies()
+            with self._lock:
+                for blocking, blocked in dependencies:
+                    self.add(blocking, blocked)
+                self._loaded_repo_ids.add(repo_id)
+        finally:
+            with self._lock:
+                del self._loading[repo_id]
+            loading.set()
+
+    def blocked_by(self, key):
+        """
+        :return: set of the issues directly blocking the issue key
+        """
+        self.load_repo(key[0])
+        with self._lock:
+            return set(self.blockers.get(key, ()))
+
+    def all_blocked_by(self, keys):
+        """
+        Transitive "blocked by" closure
+        :param keys: iterable of (repo_id, issue_number)
+        :return: set of every issue that blocks any of keys, directly or through other issues
+        """
+        found = set()
+        to_visit = list(keys)
+        while to_visit:
+            for blocker in self.blocked_by(to_visit.pop()):
+                if blocker not in found:
+                    found.add(blocker)
+                    to_visit.append(blocker)
+        return found
+
+    def critical_path(self, keys, weight=None):
+        """
+        The longest chain of blockers ending at any of keys, e.g. the issues of an epic:
+        the sequence of issues that must be finished one after the other before they can all be.
+        :param keys: iterable of (repo_id, issue_number)
+        :param weight: function giving the weight of an issue (e.g. its estimate), 1 for each issue by default
+        :return: list of issues, first blocker first, ending with one of keys, or [] if keys is empty
+        :raises DependencyGraph.CycleError: if there is a cycle among the blockers of keys
+        """
+        keys = list(keys)
+        if not keys:
+            return []
+        weight = weight or (lambda key: 1)
+        longest = dict()  # issue -> (weight of the longest chain ending at it, previous issue in that chain)
+        for key in self._blockers_first(self.all_blocked_by(keys) | set(keys)):
+            chains = [(longest[blocker][0], blocker) for blocker in self.blocked_by(key)]
+            chain_weight, previous = max(chains) if chains else (0, None)
+            longest[key] = (chain_weight + weight(key), previous)
+
+        path = []
+        key = max(keys, key=lambda key: longest[key][0])
+        while key is not None:
+            path.append(key)
+            key = longest[key][1]
+        return path[::-1]
+
+    def _blockers_first(self, keys):
+        """
+        Order keys so every issue comes after all of its blockers.
+        keys must include all the blockers of each of its issues.
+        """
+        blocker_counts = {key: len(self.blocked_by(key)) for key in keys}
+        ready = sorted(key for key, count in blocker_counts.items() if count == 0)
+        ordered = []
+        while ready:
+            key = ready.pop()
+            ordered.append(key)
+            with self._lock:
+                blocked_issues = list(self.blocking.get(key, ()))
+            for blocked in blocked_issues:
+                if blocked in blocker_counts:
+                    blocker_counts[blocked] -= 1
+                    if blocker_counts[blocked] == 0:
+                        ready.append(blocked)
+        if len(ordered) != len(keys):
+            raise DependencyGraph.CycleError(sorted(set(keys) - set(ordered)))
+        return ordered
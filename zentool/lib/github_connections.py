@@ -0,0 +1,75 @@
+import re
+import threading
+import time
+
+import requests
+import requests.adapters
+from github.Requester import HTTPRequestsConnectionClass, HTTPSRequestsConnectionClass, Requester
+
+from .api_stats import api_stats
+
+
+class CountedConnection:
+    """
+    Mixin for PyGithub's connection classes that records every HTTP request PyGithub makes in api_stats,
+    so each page of a paginated listing counts as a request, with its size and latency.
+
+    PyGithub stops reusing connections once connection classes are injected, so instead all connections
+    to a host share one requests Session, and with it its pool of HTTP connections.
+    """
+
+    POOL_SIZE = 10
+    REPO_PATH_REGEX = re.compile(r"/repos/[^/?]+/[^/?]+")
+
+    _sessions = dict()  # (protocol, host, port) -> requests.Session
+    _sessions_lock = threading.Lock()
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.session.close()
+        self.session = self._shared_session(self.protocol, self.host, self.port, self.session.auth, self.retry)
+
+    @classmethod
+    def _shared_session(cls, protocol, host, port, auth, retry):
+        with cls._sessions_lock:
+            session = cls._sessions.get((protocol, host, port))
+            if session is None:
+                session = cls._sessions[(protocol, host, port)] = requests.Session()
+                session.auth = auth
+                adapter = requests.adapters.HTTPAdapter(max_retries=retry, pool_connections=cls.POOL_SIZE,
+                                                        pool_maxsize=cls.POOL_SIZE)
+                session.mount(f"{protocol}://", adapter)
+            return session
+
+    def getresponse(self):
+        path = self.REPO_PATH_REGEX.sub("/repos/:owner/:repo", self.url)
+        start = time.perf_counter()
+        response = None
+        try:
+            response = super().getresponse()
+            return response
+        finally:
+            nbytes = len(response.response.content) if response is not None and api_stats.enabled else 0
+            error = response is None or response.status >= 400
+            api_stats.record('github', self.verb, path, time.perf_counter() - start, nbytes, error)
+            if response is not None and 'x-ratelimit-remaining' in response.headers:
+                api_stats.record_rate_limit('github', int(response.headers['x-ratelimit-remaining']),
+                                            int(response.headers.get('x-ratelimit-limit', 0)))
+
+    def close(self):
+        pass  # the session is shared, and kept for the next connection
+
+
+class CountedHTTPConnection(CountedConnection, HTTPRequestsConnectionClass):
+    pass
+
+
+class CountedHTTPSConnection(CountedConnection, HTTPSRequestsConnectionClass):
+    pass
+
+
+def count_github_requests():
+    """
+    Make every PyGithub client created from now on count its requests in api_stats
+    """
+    Requester.injectConnectionClasses(CountedHTTPConnection, CountedHTTPSConnection)
@@ -0,0 +1,91 @@
+import json
+
+import requests
+
+from .api_stats import api_stats
+
+
+class GitHubGraphQL:
+    """
+    Batch lookups of GitHub issues through the GraphQL API.
+
+    One query aliases repository(...) { issue(number: ...) } for up to MAX_ISSUES_PER_QUERY
+    issues, across any number of repos, so a whole set of (repo, number) pairs costs a
+    handful of requests instead of one REST call each.
+    """
+
+    DEFAULT_API_ENDPOINT = "https://api.github.com/graphql"
+    MAX_ISSUES_PER_QUERY = 100
+    ISSUE_FIELDS = "title state body updatedAt"
+
+    def __init__(self, api_token, api_endpoint=None):
+        self.api_token = api_token
+        self.api_endpoint = api_endpoint or GitHubGraphQL.DEFAULT_API_ENDPOINT
+        self.session = requests.Session()
+        self.session.headers.update({"Authorization": f"bearer {self.api_token}"})
+
+    def query(self, query):
+        """
+        :return: the response body.  Errors other than NOT_FOUND ones, which only mean some node is missing
+                 and comes back as null, are raised as RuntimeError.
+        """
+        with api_stats.timer('github', 'POST', "/graphql") as measurement:
+            response = self.session.post(self.api_endpoint, json={'query': query})
+            measurement['bytes'] = len(response.content)
+        remaining, limit = response.headers.get('X-RateLimit-Remaining'), response.headers.get('X-RateLimit-Limit')
+        if remaining and limit:
+            api_stats.record_rate_limit('github-graphql', int(remaining), int(limit))
+        if response.status_code != requests.codes.ok:
+            raise RuntimeError(f"Unexpected response: {response}")
+        body = response.json()
+        errors = [error for error in body.get('errors') or [] if error.get('type') != 'NOT_FOUND']
+        if errors:
+            messages = "; ".join(error.get('message', str(error)) for error in errors)
+            raise RuntimeError(f"GraphQL query failed: {messages}")
+        return body
+
+    def issues(self, pairs):
+        """
+        :param pairs: iterable of (repo_full_name, issue_number)
+        :return: dict mapping (repo_full_name, issue_number) to a dict with keys title, state, body
+                 and updated_at.  state is lowercased to match the REST API.
+                 Issues GitHub could not find are absent.
+        """
+        pairs = list(dict.fromkeys((full_name, int(number)) for full_name, number in pairs))
+        results = dict()
+        for start in range(0, len(pairs), self.MAX_ISSUES_PER_QUERY):
+            results.update(self._fetch_batch(pairs[start:start + self.MAX_ISSUES_PER_QUERY]))
+        return results
+
+    def _fetch_batch(self, pairs):
+        by_repo = dict()
+        for full_name, number in pairs:
+            by_repo.setdefault(full_name, []).append(number)
+
+        repo_aliases = dict()
+        query_parts = []
+        for repo_index, (full_name, numbers) in enumerate(by_repo.items()):
+            owner, name = full_name.split('/', 1)
+            repo_alias = f"r{repo_index}"
+            repo_aliases[repo_alias] = full_name
+            issue_parts = " ".join(f"i{number}: issue(number: {number}) {{ {self.ISSUE_FIELDS} }}"
+                                   for number in numbers)
+            query_parts.append(
+                f"{repo_alias}: repository(owner: {json.dumps(owner)}, name: {json.dumps(name)}) {{ {issue_parts} }}")
+        data = self.query("query { " + " ".join(query_parts) + " }").get('data') or {}
+
+        results = dict()
+        for repo_alias, repo_data in data.items():
+            if not repo_data:
+                continue
+            full_name = repo_aliases[repo_alias]
+            for issue_alias, issue_data in repo_data.items():
+                if not issue_data:
+                    continue
+                results[(full_name, int(issue_alias[1:]))] = {
+                    'title': issue_data['title'],
+                    'state': issue_data['state'].lower(),
+                    'body': issue_data['body'],
+                    'updated_at': issue_data['updatedAt'],
+                }
+        return results
@@ -1,49 +1,212 @@
+import json
 import os.path
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 import pickle
-from googleapiclient.discovery import build
-from google_auth_oauthlib.flow import InstalledAppFlow
-from google.auth.transport.requests import Request
 
+from .api_stats import api_stats
 from .sheet_range import SheetRange
 
 
 class GoogleSheet:
+    """
+    The Google client libraries are only imported when a sheet is first opened, and the Sheets API
+    discovery document is kept in DISCOVERY_CACHE_PATH, so building the service doesn't fetch it each run.
+    """
 
     # If modifying these scopes, delete the file token.pickle.
     SCOPES = ['https://www.googleapis.com/auth/spreadsheets']
 
-    def __init__(self, spreadsheet_id):
+    DISCOVERY_URL = "https://sheets.googleapis.com/$discovery/rest?version=v4"
+    DISCOVERY_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".zentool", "discovery", "sheets-v4.json")
+    DISCOVERY_CACHE_SECONDS = 7 * 24 * 3600
+
+    # Limits for one batchUpdate call made when flushing queued updates
+    MAX_REQUESTS_PER_BATCH = 500
+    MAX_BATCH_PAYLOAD_BYTES = 2 * 1024 * 1024
+    # Limits for one updateCells request within a batch; larger ranges are split into bands of rows
+    MAX_ROWS_PER_UPDATE = 1000
+    MAX_UPDATE_PAYLOAD_BYTES = 512 * 1024
+    # Rows read per request by iter_rows()
+    DEFAULT_WINDOW_ROWS = 1000
+
+    def __init__(self, spreadsheet_id, service=None):
+        """
+        :param service: an already-built Sheets service, in which case we don't authenticate
+        """
         self.spreadsheet_id = spreadsheet_id
         self.creds = None
-        self._authenticate()
-        self.service = build('sheets', 'v4', credentials=self.creds)
+        self._queued_requests = []
+        self._queued_bytes = 0
+        self._lock = threading.Lock()  # Google's HTTP client must not be used by two threads at once
+        if service is None:
+            self._authenticate()
+            service = self._build_service()
+        self.service = service
         self.sheets = self.service.spreadsheets()
 
     def get_cells(self, range_name):
-        result = self.sheets.values().get(spreadsheetId=self.spreadsheet_id, range=range_name).execute()
+        with api_stats.timer('sheets', 'GET', "values.get") as measurement:
+            request = self.sheets.values().get(spreadsheetId=self.spreadsheet_id, range=range_name)
+            result = self._execute(request)
+            if api_stats.enabled:
+                measurement['bytes'] = len(json.dumps(result))
         return result.get('values', [])
 
+    def get_cells_batch(self, range_names, value_render_option='FORMATTED_VALUE'):
+        """
+        Read several ranges in one values.batchGet call.
+        With FORMATTED_VALUE cells read as the sheet displays them, e.g. "123" for =HYPERLINK("...","123"),
+        as get_cells() does.  Use FORMULA to get the formulas themselves.
+        :return: a list of the values of each range, in the form returned by get_cells()
+        """
+        with api_stats.timer('sheets', 'GET', "values.batchGet") as measurement:
+            request = self.sheets.values().batchGet(spreadsheetId=self.spreadsheet_id, ranges=list(range_names),
+                                                    valueRenderOption=value_render_option)
+            result = self._execute(request)
+            if api_stats.enabled:
+                measurement['bytes'] = len(json.dumps(result))
+        return [value_range.get('values', []) for value_range in result.get('valueRanges', [])]
+
+    def iter_rows(self, first_row, first_column, last_column, window_rows=None, first_window=None):
+        """
+        Yield (row number, values) for every row from first_row down, as get_cells() would return them.
+        Rows are read window_rows at a time, the next window being fetched in the background while
+        the current one is consumed.  Reading stops at the first window that is entirely empty.
+        :param first_window: values of the first window, if they have already been read
+        """
+        window_rows = window_rows or self.DEFAULT_WINDOW_ROWS
+
+        def read_window(start_row):
+            return self.get_cells(f"{first_column}{start_row}:{last_column}{start_row + window_rows - 1}")
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            start_row = first_row
+            values = first_window if first_window is not None else read_window(start_row)
+            while values:
+                next_window = executor.submit(read_window, start_row + window_rows)
+                for row_number, row in enumerate(values, start=start_row):
+                    yield row_number, row
+                start_row += window_rows
+                values = next_window.result()
+
+    def get_sheet_range(self, range_name):
+        """
+        Read values/formulas and background colours in one call.
+        :return: a SheetRange of the current contents of range_name
+        """
+        fields = ("sheets(data(startRow,startColumn,"
+                  "rowData(values(userEnteredValue,userEnteredFormat/backgroundColor))))")
+        with api_stats.timer('sheets', 'GET', "spreadsheets.get") as measurement:
+            request = self.sheets.get(spreadsheetId=self.spreadsheet_id, ranges=[range_name],
+                                      includeGridData=True, fields=fields)
+            result = self._execute(request)
+            if api_stats.enabled:
+                measurement['bytes'] = len(json.dumps(result))
+        return SheetRange.from_google_grid_data(result['sheets'][0]['data'][0])
+
     def get_cell(self, address):
         values = self.get_cells(address)
         return values[0][0] if values else None
 
     def update_range(self, cells: SheetRange):
-        body = {
-            'requests': [
-                {
-                    'updateCells': {
-                        'range': cells.to_google_grid_range(),
-                        'fields': "*",
-                        'rows': cells.to_google_rows()
-                    }
-                }
-            ]
-        }
-        request = self.sheets.batchUpdate(spreadsheetId=self.spreadsheet_id, body=body)
-        return request.execute()
+        """
+        Write cells now, in as many size-bounded requests and batches as it takes
+        """
+        self.queue_update(cells)
+        return self.flush()
+
+    def queue_update(self, cells: SheetRange):
+        """
+        Queue an update to be sent by flush() in a batchUpdate shared with other updates.
+        Flushes automatically once a batch's worth of updates has been queued.
+        """
+        for request, request_bytes in self._update_cells_requests(cells):
+            if self._queued_requests and (
+                    len(self._queued_requests) >= self.MAX_REQUESTS_PER_BATCH or
+                    self._queued_bytes + request_bytes > self.MAX_BATCH_PAYLOAD_BYTES):
+                self.flush()
+            self._queued_requests.append(request)
+            self._queued_bytes += request_bytes
+
+    def flush(self):
+        """
+        Send all queued updates
+        """
+        if not self._queued_requests:
+            return None
+        requests, nbytes = self._queued_requests, self._queued_bytes
+        self._queued_requests, self._queued_bytes = [], 0
+        return self._batch_update(requests, nbytes)
+
+    def _batch_update(self, requests, nbytes):
+        """
+        :param nbytes: approximate size of the requests, as measured when they were queued
+        """
+        body = {'requests': requests}
+        with api_stats.timer('sheets', 'POST', "batchUpdate") as measurement:
+            measurement['bytes'] = nbytes
+            request = self.sheets.batchUpdate(spreadsheetId=self.spreadsheet_id, body=body)
+            return self._execute(request)
+
+    def _execute(self, request):
+        with self._lock:
+            return request.execute()
+
+    def _update_cells_requests(self, cells: SheetRange):
+        """
+        updateCells requests covering the bounding box of cells, one per band of rows,
+        each band holding at most MAX_ROWS_PER_UPDATE rows and MAX_UPDATE_PAYLOAD_BYTES of row data
+        :return: a list of (request, approximate size in bytes)
+        """
+        grid_range = cells.to_google_grid_range()
+        bands = []  # (first row index, rows, bytes)
+        band_start, band_rows, band_bytes = grid_range['startRowIndex'], [], 0
+        for row_index, row in enumerate(cells.to_google_rows(), start=band_start):
+            row_bytes = len(json.dumps(row))
+            if band_rows and (len(band_rows) >= self.MAX_ROWS_PER_UPDATE or
+                              band_bytes + row_bytes > self.MAX_UPDATE_PAYLOAD_BYTES):
+                bands.append((band_start, band_rows, band_bytes))
+                band_start, band_rows, band_bytes = row_index, [], 0
+            band_rows.append(row)
+            band_bytes += row_bytes
+        if band_rows:
+            bands.append((band_start, band_rows, band_bytes))
+        return [
+            ({'updateCells': {'range': dict(grid_range, startRowIndex=start, endRowIndex=start + len(rows)),
+                              'fields': "*",
+                              'rows': rows}}, nbytes)
+            for start, rows, nbytes in bands
+        ]
+
+    def _build_service(self):
+        from googleapiclient.discovery import build_from_document
+        return build_from_document(self._discovery_document(), credentials=self.creds)
+
+    def _discovery_document(self):
+        """
+        :return: the Sheets API discovery document, from DISCOVERY_CACHE_PATH if it was fetched recently enough
+        """
+        path = self.DISCOVERY_CACHE_PATH
+        if os.path.exists(path) and time.time() - os.path.getmtime(path) < self.DISCOVERY_CACHE_SECONDS:
+            with open(path) as discovery_file:
+                return discovery_file.read()
+        import requests
+        with api_stats.timer('sheets', 'GET', "$discovery/rest") as measurement:
+            response = requests.get(self.DISCOVERY_URL)
+            response.raise_for_status()
+            measurement['bytes'] = len(response.content)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as discovery_file:
+            discovery_file.write(response.text)
+        return response.text
 
     def _authenticate(self):
+        from google.auth.transport.requests import Request
+        from google_auth_oauthlib.flow import InstalledAppFlow
+
         # The file token.pickle stores the user's access and refresh tokens, and is
         # created automatically when the authorization flow completes for the first
         # time.
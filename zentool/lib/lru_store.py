@@ -0,0 +1,41 @@
+import collections
+import threading
+
+
+class LRUStore:
+    """
+    In-memory map holding at most max_items values, the least recently used being dropped first.
+    Used to keep large raw API objects around while they are being used, without them accumulating
+    over a large crawl.  Safe to share between threads.
+    """
+
+    def __init__(self, max_items):
+        self.max_items = max_items  # may be raised at any time, but lowering it only takes effect on the next store
+        self._items = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._items:
+                return default
+            self._items.move_to_end(key)
+            return self._items[key]
+
+    def setdefault(self, key, value):
+        """
+        :return: the value already stored for key, or else value, which is stored
+        """
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                return self._items[key]
+            self._items[key] = value
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+            return value
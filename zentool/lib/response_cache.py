@@ -0,0 +1,103 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+
+class ResponseCache:
+    """
+    Persistent on-disk cache of API GET responses, stored in SQLite.
+
+    Each path is matched against TTL_RULES to decide how long its response stays fresh.
+    Paths that match no rule are not cached.  The cache is bounded to max_entries rows,
+    least recently fetched rows being evicted first.
+
+    Keys end with a hash of the API token the response was fetched with, as the cache file is shared
+    by every token used on the machine, and one token may see data another can't.
+    """
+
+    DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".zentool", "cache.sqlite")
+    DEFAULT_MAX_ENTRIES = 20000
+
+    TTL_RULES = [
+        (re.compile(r"^/p1/repositories/\d+/epics$"), 300),
+        (re.compile(r"^/p1/repositories/\d+/epics/\d+$"), 300),
+        (re.compile(r"^/p1/repositories/\d+/issues/\d+$"), 300),
+        (re.compile(r"^/p1/repositories/\d+/board$"), 300),
+        (re.compile(r"^/p1/repositories/\d+/dependencies$"), 300),
+        (re.compile(r"^/p1/repositories/\d+/reports/releases$"), 3600),
+        (re.compile(r"^/p1/reports/release/\d+$"), 3600),
+    ]
+
+    def __init__(self, path=None, max_entries=None, refresh=False):
+        """
+        :param refresh: if True, never answer from the cache, but still store fresh responses
+        """
+        self.path = path or self.DEFAULT_PATH
+        self.max_entries = max_entries or self.DEFAULT_MAX_ENTRIES
+        self.refresh = refresh
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.db = sqlite3.connect(self.path, check_same_thread=False)
+        self.db.execute("CREATE TABLE IF NOT EXISTS responses "
+                        "(key TEXT PRIMARY KEY, data TEXT NOT NULL, fetched_at REAL NOT NULL)")
+        self.db.execute("CREATE INDEX IF NOT EXISTS responses_fetched_at ON responses (fetched_at)")
+        self.db.commit()
+
+    @staticmethod
+    def key(api_endpoint, path, api_token):
+        """
+        :return: the key of the response to a GET of path, made with api_token
+        """
+        token_hash = hashlib.sha256((api_token or "").encode('utf-8')).hexdigest()[:16]
+        return f"{api_endpoint}{path}#{token_hash}"
+
+    def ttl(self, path):
+        for pattern, ttl in self.TTL_RULES:
+            if pattern.match(path):
+                return ttl
+        return None
+
+    def get(self, key, path):
+        """
+        :return: the cached response for key, or None if there is no fresh one
+        """
+        ttl = self.ttl(path)
+        if self.refresh or ttl is None:
+            return None
+        with self._lock:
+            row = self.db.execute("SELECT data, fetched_at FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is None or time.time() - row[1] > ttl:
+            return None
+        return json.loads(row[0])
+
+    def put(self, key, path, data):
+        if self.ttl(path) is None:
+            return
+        with self._lock:
+            self.db.execute("INSERT OR REPLACE INTO responses (key, data, fetched_at) VALUES (?, ?, ?)",
+                            (key, json.dumps(data), time.time()))
+            self._evict()
+            self.db.commit()
+
+    def invalidate(self, key_prefix):
+        """
+        Drop every cached response whose key starts with key_prefix, whichever token fetched it
+        """
+        with self._lock:
+            self.db.execute("DELETE FROM responses WHERE substr(key, 1, ?) = ?", (len(key_prefix), key_prefix))
+            self.db.commit()
+
+    def clear(self):
+        with self._lock:
+            self.db.execute("DELETE FROM responses")
+            self.db.commit()
+
+    def _evict(self):
+        (count,) = self.db.execute("SELECT COUNT(*) FROM responses").fetchone()
+        if count > self.max_entries:
+            self.db.execute("DELETE FROM responses WHERE key IN "
+                            "(SELECT key FROM responses ORDER BY fetched_at LIMIT ?)", (count - self.max_entries,))
@@ -1,17 +1,44 @@
-from functools import reduce
+import re
+
+
+def column_letter_to_number(col_letter):
+    """
+    :return: the 1-based column number of a column letter, e.g. "A" -> 1, "AA" -> 27
+    """
+    number = 0
+    for letter in col_letter.upper():
+        number = number * 26 + ord(letter) - 64
+    return number
+
+
+def column_number_to_letter(column_number):
+    """
+    column_number should be 1-based, e.g. 1 -> "A", 27 -> "AA"
+    """
+    letters = ""
+    while column_number > 0:
+        column_number, remainder = divmod(column_number - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
 
 
 class SheetRange:
 
     """
     A Spreadsheet Range (2 dimensional array of cells).
-    Implemented as a sparse matrix using dicts of dicts.
+    Implemented as a sparse matrix using dicts of dicts: row number -> column number -> Cell,
+    both 1-based integers.  Cells may be addressed as ('A', 1), (1, 1) or "A1".
+    The bounding box is maintained as cells are set, so it is always available in O(1).
     """
 
+    CELL_ADDRESS_REGEX = re.compile(r"^([A-Za-z]+)(\d+)$")
+
     class Cell:
         """
         Our representation of a cell.
         """
+        __slots__ = ('value', 'type', 'bg')
+
         def __init__(self, value=None, value_type=None, bg=None):
             self.value = value
             self.type = value_type
@@ -22,6 +49,8 @@ class SheetRange:
             'formula': 'formulaValue',
             'number': 'numberValue'
         }
+        GOOGLE_CELL_TYPE_TO_TYPE = {v: k for k, v in TYPE_TO_GOOGLE_CELL_TYPE.items()}
+        COLORS = ('red', 'green', 'blue')
 
         def __str__(self):
             return f"Cell(\"{self.value}\")"
@@ -29,6 +58,26 @@ class SheetRange:
         def __repr__(self):
             return self.__str__()
 
+        @classmethod
+        def from_google_cell_data(cls, cell_data):
+            cell = cls()
+            for google_type, value in cell_data.get('userEnteredValue', {}).items():
+                if google_type in cls.GOOGLE_CELL_TYPE_TO_TYPE:
+                    cell.type = cls.GOOGLE_CELL_TYPE_TO_TYPE[google_type]
+                    cell.value = value
+            google_bg = cell_data.get('userEnteredFormat', {}).get('backgroundColor')
+            if google_bg is not None:
+                cell.bg = {color: round(float(google_bg.get(color, 0)) * 255) for color in cls.COLORS}
+            return cell
+
+        def comparison_key(self):
+            """
+            :return: what this cell looks like once written to a sheet, for spotting unchanged cells
+            """
+            value = float(self.value) if self.type == 'number' else self.value
+            bg = tuple(round(self.bg[color] / 255, 2) for color in self.COLORS) if self.bg else None
+            return self.type, value, bg
+
         def to_google_cell_data(self):
             cell_data = {}
             cell_data['userEnteredValue'] = {self.TYPE_TO_GOOGLE_CELL_TYPE[self.type]: self.value}
@@ -44,102 +93,159 @@ class SheetRange:
             return cell_data
 
     def __init__(self):
-        self.cols = dict()
+        self.rows = dict()
+        self.lowest_col_number = None
+        self.highest_col_number = None
+        self.lowest_row = None
+        self.highest_row = None
 
     def __setitem__(self, key, value):
-        # TODO: allow it to take ('A', 1) or "A1" or (1, 1)
-        colnum, rownum = key
-        if colnum not in self.cols:
-            self.cols[colnum] = dict()
+        colnum, rownum = self._parse_address(key)
         if type(value) in [int, float]:
             cell_type = 'number'
-        elif type(value) == str:
+        elif isinstance(value, str):
             cell_type = 'formula' if value.startswith('=') else 'string'
         else:
             raise RuntimeError(f"Can't establish cell type for {value}")
 
-        self.cols[colnum][rownum] = self.Cell(value=value, value_type=cell_type)
+        self._set_cell(colnum, rownum, self.Cell(value=value, value_type=cell_type))
+
+    def _extend_bounds(self, colnum, rownum):
+        if self.lowest_row is None:
+            self.lowest_col_number = self.highest_col_number = colnum
+            self.lowest_row = self.highest_row = rownum
+            return
+        self.lowest_col_number = min(self.lowest_col_number, colnum)
+        self.highest_col_number = max(self.highest_col_number, colnum)
+        self.lowest_row = min(self.lowest_row, rownum)
+        self.highest_row = max(self.highest_row, rownum)
+
+    def _set_cell(self, colnum, rownum, cell):
+        row = self.rows.get(rownum)
+        if row is None:
+            row = self.rows[rownum] = dict()
+        row[colnum] = cell
+        self._extend_bounds(colnum, rownum)
 
     def __getitem__(self, item):
-        # TODO: allow it to take ('A', 1) or "A1" or (1, 1)
-        colnum, rownum = item
-        return self.cols.get(colnum, {}).get(rownum, None)
+        colnum, rownum = self._parse_address(item)
+        return self.rows.get(rownum, {}).get(colnum, None)
+
+    def _parse_address(self, key):
+        """
+        :return: (column number, row number) for ('A', 1), (1, 1) or "A1"
+        """
+        if isinstance(key, str):
+            match = self.CELL_ADDRESS_REGEX.match(key)
+            if not match:
+                raise RuntimeError(f"Can't parse cell address {key}")
+            return column_letter_to_number(match.group(1)), int(match.group(2))
+        col, rownum = key
+        return (column_letter_to_number(col) if isinstance(col, str) else col), rownum
 
     def __str__(self):
         if self.is_empty:
-            return f"Range(EMPTY)"
+            return "Range(EMPTY)"
         else:
-            return f"Range({self.name}, {self.cols})"
+            return f"Range({self.name}, {self.rows})"
 
     def __repr__(self):
         return self.__str__()
 
     @property
     def is_empty(self):
-        return len(self.cols) == 0
-
-    @property
-    def name(self):
-        """
-        :return: a spreadsheet range name that encompasses all the data e.g. "A1:B2"
-        """
-        return f"{self.lowest_col}{self.lowest_row}:{self.highest_col}{self.highest_row}"
+        return self.lowest_row is None
 
     @property
     def lowest_col(self):
-        colnames = sorted(self.cols.keys())
-        return colnames[0]
+        return column_number_to_letter(self.lowest_col_number)
 
     @property
     def highest_col(self):
-        colnames = sorted(self.cols.keys())
-        return colnames[-1]
+        return column_number_to_letter(self.highest_col_number)
 
     @property
-    def lowest_row(self):
-        lists_of_rownums = [list(col.keys()) for colname, col in self.cols.items()]
-        list_of_rownums = reduce(lambda l1, l2: l1+l2, lists_of_rownums)
-        return sorted(list_of_rownums)[0]
-
-    @property
-    def highest_row(self):
-        lists_of_rownums = [list(col.keys()) for colname, col in self.cols.items()]
-        list_of_rownums = reduce(lambda l1, l2: l1+l2, lists_of_rownums)
-        return sorted(list_of_rownums)[-1]
+    def name(self):
+        """
+        :return: a spreadsheet range name that encompasses all the data e.g. "A1:B2"
+        """
+        return f"{self.lowest_col}{self.lowest_row}:{self.highest_col}{self.highest_row}"
 
     def to_array(self):
         """
         :return: an array of arrays containing the data (rows, cols)
         """
-        rows = []
-        for rownum in range(self.lowest_row, self.highest_row+1):
-            row = []
-            for colnum in range(ord(self.lowest_col), ord(self.highest_col)+1):
-                colname = chr(colnum)
-                row.append(self[colname, rownum])
-            rows.append(row)
-        return rows
+        colnums = range(self.lowest_col_number, self.highest_col_number+1)
+        return [
+            [self.rows.get(rownum, {}).get(colnum) for colnum in colnums]
+            for rownum in range(self.lowest_row, self.highest_row+1)
+        ]
 
     def to_google_grid_range(self, sheet_id=0):
         return {
             'sheetId': sheet_id,
             'startRowIndex': self.lowest_row - 1,
             'endRowIndex': self.highest_row,
-            'startColumnIndex': self._column_letter_to_0_based_integer(self.lowest_col),
-            'endColumnIndex': self._column_letter_to_0_based_integer(self.highest_col) + 1
+            'startColumnIndex': self.lowest_col_number - 1,
+            'endColumnIndex': self.highest_col_number
         }
 
     def to_google_rows(self):
+        colnums = range(self.lowest_col_number, self.highest_col_number+1)
         rows = []
         for rownum in range(self.lowest_row, self.highest_row+1):
-            row = {'values': []}
-            for colnum in range(ord(self.lowest_col), ord(self.highest_col)+1):
-                col_letter = chr(colnum)
-                cell = self[col_letter, rownum]
-                cell_data = cell.to_google_cell_data() if cell else {}
-                row['values'].append(cell_data)
-            rows.append(row)
+            row = self.rows.get(rownum, {})
+            values = []
+            for colnum in colnums:
+                cell = row.get(colnum)
+                values.append(cell.to_google_cell_data() if cell else {})
+            rows.append({'values': values})
         return rows
 
-    def _column_letter_to_0_based_integer(self, col_letter):
-        return ord(col_letter) - 65
+    @classmethod
+    def from_google_grid_data(cls, grid_data):
+        """
+        Build a SheetRange from the GridData of a spreadsheets.get(includeGridData=True) response
+        """
+        sheet_range = cls()
+        first_rownum = grid_data.get('startRow', 0) + 1
+        first_colnum = grid_data.get('startColumn', 0) + 1
+        for row_offset, row_data in enumerate(grid_data.get('rowData', [])):
+            for col_offset, cell_data in enumerate(row_data.get('values', [])):
+                if cell_data:
+                    sheet_range._set_cell(first_colnum + col_offset, first_rownum + row_offset,
+                                          cls.Cell.from_google_cell_data(cell_data))
+        return sheet_range
+
+    def changed_ranges(self, current):
+        """
+        Compare this range with the current contents of the sheet.
+        Cells in our bounding box that we don't have a value for count as empty,
+        as that is how update_range() would write them.
+        :param current: SheetRange holding the current contents of the sheet
+        :return: a list of SheetRanges, one per horizontal run of cells that differ from current
+        """
+        if self.is_empty:
+            return []
+        empty_key = self.Cell().comparison_key()
+        changed = []
+        for rownum in range(self.lowest_row, self.highest_row+1):
+            row = self.rows.get(rownum, {})
+            current_row = current.rows.get(rownum, {})
+            run = None
+            for colnum in range(self.lowest_col_number, self.highest_col_number+1):
+                cell = row.get(colnum)
+                current_cell = current_row.get(colnum)
+                key = cell.comparison_key() if cell else empty_key
+                current_key = current_cell.comparison_key() if current_cell else empty_key
+                if key == current_key:
+                    run = None
+                    continue
+                if run is None:
+                    run = SheetRange()
+                    changed.append(run)
+                if cell:
+                    run._set_cell(colnum, rownum, cell)
+                else:
+                    run._extend_bounds(colnum, rownum)
+        return changed
@@ -0,0 +1,154 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+
+class Snapshot:
+    """
+    A local copy of a repo's ZenHub and GitHub data, written by `zentool snapshot`,
+    that other commands can be run against without making any ZenHub or GitHub requests.
+
+    It is a SQLite file holding:
+
+        repos       id and full name of every repo referenced
+        responses   raw ZenHub GET responses (epics, boards, releases...), keyed by path
+        issues      title, state, updated_at and (of epics) body of GitHub issues, keyed by (repo_id, number)
+
+    Response and issue data are stored as zlib-compressed JSON.  Nothing is read until it is
+    asked for, and reads go through a memory-mapped view of the file, so even a large
+    snapshot opens instantly.
+    """
+
+    FORMAT_VERSION = 1
+    MMAP_SIZE = 1 << 30
+
+    class Repo:
+        """
+        Stands in for a PyGithub Repository when working from a snapshot
+        """
+
+        def __init__(self, id, full_name):
+            self.id = id
+            self.full_name = full_name
+
+        def __getattr__(self, name):
+            raise RuntimeError(f"GitHub repo {self.full_name} has no '{name}' when working from a snapshot")
+
+    def __init__(self, path, create=False):
+        """
+        :param create: if True, start a new, empty snapshot at path, replacing any existing file
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        if create:
+            if os.path.exists(path):
+                os.remove(path)
+            self.db = sqlite3.connect(path, check_same_thread=False)
+            self._create_tables()
+        else:
+            if not os.path.exists(path):
+                raise RuntimeError(f"No such snapshot: {path}")
+            self.db = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+            self._check_version()
+        self.db.execute(f"PRAGMA mmap_size = {self.MMAP_SIZE}")
+
+    def __str__(self):
+        return f"{self.__class__.__name__} {self.path} of {self.meta('repo_name')} taken {self.meta('taken_at')}"
+
+    def _create_tables(self):
+        self.db.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self.db.execute("CREATE TABLE repos (id INTEGER PRIMARY KEY, full_name TEXT NOT NULL UNIQUE)")
+        self.db.execute("CREATE TABLE responses (path TEXT PRIMARY KEY, data BLOB NOT NULL)")
+        self.db.execute("CREATE TABLE issues (repo_id INTEGER NOT NULL, number INTEGER NOT NULL, "
+                        "data BLOB NOT NULL, PRIMARY KEY (repo_id, number)) WITHOUT ROWID")
+        self.record_meta('format_version', self.FORMAT_VERSION)
+        self.db.commit()
+
+    def _check_version(self):
+        version = self.meta('format_version')
+        if version != str(self.FORMAT_VERSION):
+            raise RuntimeError(f"{self.path} is not a snapshot this version of zentool can read")
+
+    @staticmethod
+    def _pack(data):
+        return zlib.compress(json.dumps(data, separators=(',', ':')).encode('utf8'))
+
+    @staticmethod
+    def _unpack(blob):
+        return json.loads(zlib.decompress(blob).decode('utf8'))
+
+    def _fetch_one(self, query, params):
+        with self._lock:
+            try:
+                return self.db.execute(query, params).fetchone()
+            except sqlite3.DatabaseError:
+                raise RuntimeError(f"{self.path} is not a snapshot")
+
+    def meta(self, key):
+        row = self._fetch_one("SELECT value FROM meta WHERE key = ?", (key,))
+        return row[0] if row else None
+
+    def record_meta(self, key, value):
+        with self._lock:
+            self.db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+    def repo(self, full_name_or_id):
+        """
+        :return: a Snapshot.Repo
+        """
+        if isinstance(full_name_or_id, int) or str(full_name_or_id).isdigit():
+            row = self._fetch_one("SELECT id, full_name FROM repos WHERE id = ?", (int(full_name_or_id),))
+        else:
+            row = self._fetch_one("SELECT id, full_name FROM repos WHERE full_name = ?", (full_name_or_id,))
+        if row is None:
+            raise RuntimeError(f"Repo {full_name_or_id} is not in snapshot {self.path}")
+        return Snapshot.Repo(*row)
+
+    def record_repo(self, repo_id, full_name):
+        with self._lock:
+            self.db.execute("INSERT OR REPLACE INTO repos (id, full_name) VALUES (?, ?)", (repo_id, full_name))
+
+    def response(self, path):
+        """
+        :return: the ZenHub response recorded for path, or None
+        """
+        row = self._fetch_one("SELECT data FROM responses WHERE path = ?", (path,))
+        return self._unpack(row[0]) if row else None
+
+    def record_response(self, path, data):
+        with self._lock:
+            self.db.execute("INSERT OR REPLACE INTO responses (path, data) VALUES (?, ?)", (path, self._pack(data)))
+
+    def issue(self, repo_id, number):
+        """
+        :return: dict with keys title, state, updated_at and, for epics, body,
+                 or None if the issue is not in the snapshot
+        """
+        row = self._fetch_one("SELECT data FROM issues WHERE repo_id = ? AND number = ?", (repo_id, int(number)))
+        return self._unpack(row[0]) if row else None
+
+    def issues(self, repo_id):
+        """
+        :return: dict mapping issue number to the data of every issue of the repo in the snapshot
+        """
+        with self._lock:
+            rows = self.db.execute("SELECT number, data FROM issues WHERE repo_id = ?", (repo_id,)).fetchall()
+        return {number: self._unpack(blob) for number, blob in rows}
+
+    def record_issue(self, repo_id, number, gh_data):
+        with self._lock:
+            self.db.execute("INSERT OR REPLACE INTO issues (repo_id, number, data) VALUES (?, ?, ?)",
+                            (repo_id, int(number), self._pack(gh_data)))
+
+    def finish(self, repo_name):
+        """
+        Stamp and compact a newly written snapshot
+        """
+        self.record_meta('repo_name', repo_name)
+        self.record_meta('taken_at', time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()))
+        with self._lock:
+            self.db.commit()
+            self.db.execute("VACUUM")
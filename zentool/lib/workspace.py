@@ -0,0 +1,160 @@
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+
+class Workspace:
+    """
+    One in-memory index of the issues of a set of repos, keyed by (repo_id, issue_number),
+    holding each issue's pipeline, estimate, state, and the epics and releases it belongs to.
+
+    crawl() fetches, for every repo concurrently, its board, one paginated listing of its GitHub issues,
+    its epics and its releases, then the issue lists of those epics and releases.  Questions about any
+    of those issues are then answered from the index, without further requests.
+
+    To keep the index small however many issues it holds, only the fields we use are kept, in slotted
+    Entry records, repo ids and repeated strings are shared between entries, and raw API responses
+    (boards included) are reduced to those fields by the worker thread that fetched them.
+    """
+
+    class Entry:
+        __slots__ = ('repo_id', 'number', 'state', 'title', 'pipeline', 'estimate', 'epics', 'releases')
+
+        def __init__(self, repo_id, number):
+            self.repo_id = repo_id
+            self.number = number
+            self.state = None
+            self.title = None
+            self.pipeline = None
+            self.estimate = None
+            self.epics = ()  # (repo_id, epic_number) of the epics the issue is attached to
+            self.releases = ()  # ids of the releases the issue is in
+
+        def __str__(self):
+            return f"{self.__class__.__name__}({self.repo_id}/{self.number} \"{self.title}\", state={self.state}, " \
+                   f"pipeline={self.pipeline}, estimate={self.estimate}, epics={list(self.epics)}, " \
+                   f"releases={list(self.releases)})"
+
+    def __init__(self, combo, max_workers=None):
+        self.combo = combo
+        self.max_workers = max_workers or combo.HYDRATION_WORKERS
+        self.repos = dict()  # repo id -> Combo.Repo
+        self.index = dict()  # (repo_id, issue_number) -> Workspace.Entry
+        self.pipelines = dict()  # repo id -> tuple of the names of its board's pipelines, in board order
+        self.epics = dict()  # (repo_id, epic_number) -> tuple of (repo_id, issue_number)
+        self.releases = dict()  # release id -> ZenHub.Release
+        self._repo_ids = dict()  # repo id -> the one int object used for it in entries
+
+    def __str__(self):
+        return f"{self.__class__.__name__}({len(self.repos)} repos, {len(self.index)} issues, " \
+               f"{len(self.epics)} epics, {len(self.releases)} releases)"
+
+    def crawl(self, repo_names_or_ids):
+        """
+        :param repo_names_or_ids: iterable of repo full names or ids
+        :return: self
+        """
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            repos = list(executor.map(self.combo.repo, dict.fromkeys(repo_names_or_ids)))
+            self.repos.update((repo.id, repo) for repo in repos)
+
+            fetches = [
+                (repo,
+                 executor.submit(self._board_pipelines, repo),
+                 executor.submit(self._issue_states, repo),
+                 executor.submit(repo.zen.epics),
+                 executor.submit(repo.zen.releases))
+                for repo in repos
+            ]
+            epic_fetches = []
+            release_fetches = []
+            for repo, pipelines, states, epics, releases in fetches:
+                self._index_board(repo, pipelines.result())
+                self._index_states(repo, states.result())
+                epic_fetches += [((repo.id, int(zh_epic.id)), executor.submit(self._epic_issue_keys, repo, zh_epic.id))
+                                 for zh_epic in epics.result()]
+                for release in releases.result():
+                    if release.id not in self.releases:
+                        self.releases[release.id] = release
+                        release_fetches.append((release, executor.submit(release.issue_keys)))
+
+            for epic_key, issue_keys in epic_fetches:
+                self._index_epic(epic_key, issue_keys.result())
+            for release, issue_keys in release_fetches:
+                for key in issue_keys.result():
+                    entry = self._entry(key)
+                    entry.releases += (release.id,)
+        return self
+
+    def issue(self, repo_id, issue_number):
+        """
+        :return: the Workspace.Entry of an issue, or None if the crawl didn't come across it
+        """
+        return self.index.get((repo_id, int(issue_number)))
+
+    def issues(self, repo_id=None, pipeline=None, state=None, epic=None, release_id=None):
+        """
+        :param epic: (repo_id, epic_number)
+        :return: list of ((repo_id, issue_number), Workspace.Entry) of the issues matching all the criteria given
+        """
+        return [
+            (key, entry) for key, entry in sorted(self.index.items())
+            if (repo_id is None or key[0] == repo_id) and
+               (pipeline is None or entry.pipeline == pipeline) and
+               (state is None or entry.state == state) and
+               (epic is None or epic in entry.epics) and
+               (release_id is None or release_id in entry.releases)
+        ]
+
+    def _entry(self, key):
+        entry = self.index.get(key)
+        if entry is None:
+            repo_id = self._repo_ids.setdefault(key[0], key[0])
+            entry = self.index[(repo_id, key[1])] = Workspace.Entry(repo_id, key[1])
+        return entry
+
+    @staticmethod
+    def _issue_states(repo):
+        """
+        :return: dict mapping issue number to (state, title), for every issue of the repo
+        """
+        return {number: (sys.intern(gh_data['state']), gh_data['title'])
+                for number, gh_data in repo.issues_data(state='all').items()}
+
+    @staticmethod
+    def _board_pipelines(repo):
+        """
+        :return: tuple of (pipeline name, tuple of (issue number, estimate)), in board order
+        """
+        board = repo.combo.zenhub.board(repo.id, keep=False)
+        return tuple(
+            (sys.intern(pipeline['name']),
+             tuple((int(issue_data['issue_number']), (issue_data.get('estimate') or {}).get('value'))
+                   for issue_data in pipeline['issues']))
+            for pipeline in board.pipelines()
+        )
+
+    @staticmethod
+    def _epic_issue_keys(repo, epic_number):
+        """
+        :return: tuple of (repo_id, issue_number) of the issues of an epic
+        """
+        return tuple((issue_data['repo_id'], int(issue_data['issue_number']))
+                     for issue_data in repo.zen.epic(epic_number).raw_issues())
+
+    def _index_board(self, repo, pipelines):
+        self.pipelines[repo.id] = tuple(name for name, issues in pipelines)
+        for name, issues in pipelines:
+            for number, estimate in issues:
+                entry = self._entry((repo.id, number))
+                entry.pipeline, entry.estimate = name, estimate
+
+    def _index_states(self, repo, states):
+        for number, (state, title) in states.items():
+            entry = self._entry((repo.id, int(number)))
+            entry.state, entry.title = state, title
+
+    def _index_epic(self, epic_key, issue_keys):
+        self.epics[epic_key] = issue_keys
+        for key in issue_keys:
+            entry = self._entry(key)
+            entry.epics += (epic_key,)
@@ -1,6 +1,13 @@
 import json
+import sys
+import threading
+import time
 
 import requests
+import requests.adapters
+
+from .api_stats import api_stats
+from .lru_store import LRUStore
 
 
 class ZenHub:
@@ -40,40 +47,209 @@ class ZenHub:
     """
 
     DEFAULT_API_ENDPOINT = "https://api.zenhub.io"
-
-    def __init__(self, api_token, api_endpoint=None):
+    POOL_SIZE = 10
+    MAX_RETRIES = 5
+    RATE_LIMITED_STATUS_CODES = (403, 429)
+    MAX_BOARDS = 64  # boards are large, so by default only this many of the most recently used are kept
+
+    def __init__(self, api_token, api_endpoint=None, cache=None, snapshot=None, max_boards=None):
+        """
+        :param cache: optional ResponseCache used to answer GET requests
+        :param snapshot: optional Snapshot to answer GET requests from, instead of the API
+        :param max_boards: how many boards to keep, MAX_BOARDS by default
+        """
         self.api_token = api_token
         self.api_endpoint = api_endpoint or ZenHub.DEFAULT_API_ENDPOINT
+        self.cache = cache
+        self.snapshot = snapshot
+        self.session = requests.Session()
+        self.session.headers.update({"X-Authentication-Token": self.api_token})
+        adapter = requests.adapters.HTTPAdapter(pool_connections=self.POOL_SIZE, pool_maxsize=self.POOL_SIZE)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.rate_limit = ZenHub.RateLimit()
+        self._repos = dict()  # repo id -> ZenHub.Repo, so all issues of a repo share one
+        self._boards = LRUStore(max_boards or self.MAX_BOARDS)  # repo id -> ZenHub.Board
 
     def repository(self, repo_id):
-        return ZenHub.Repo(repo_id, self)
+        repo = self._repos.get(repo_id)
+        if repo is None:
+            repo = self._repos.setdefault(repo_id, ZenHub.Repo(repo_id, self))
+        return repo
+
+    def board(self, repo_id, keep=True):
+        """
+        A repo's board, fetched at most once while it is among the max_boards most recently used.
+        Once it has been fetched, issues of that repo are answered from it rather than one request each.
+        :param keep: if False, a board fetched now is not kept, e.g. when the caller only needs it once
+        """
+        board = self._boards.get(repo_id)
+        if board is None:
+            data = self.get(f"/p1/repositories/{repo_id}/board")
+            board = ZenHub.Board(data, repo=self.repository(repo_id))
+            if keep:
+                board = self._boards.setdefault(repo_id, board)
+        return board
+
+    def keep_boards(self, repo_count):
+        """
+        Keep at least repo_count boards, e.g. one for each repo of a tracker being synced,
+        so a large tracker doesn't go back to one request per issue
+        """
+        self._boards.max_items = max(self._boards.max_items, repo_count)
+
+    def loaded_board(self, repo_id):
+        """
+        :return: the repo's board if it has already been fetched, otherwise None
+        """
+        return self._boards.get(repo_id)
 
     def release(self, release_id):
         return ZenHub.Release(release_id=release_id, zenhub=self)
 
     def get(self, path):
-        url = f"{self.api_endpoint}{path}"
-        response = requests.get(url, headers={"X-Authentication-Token": self.api_token})
-        if response.status_code == requests.codes.ok:
-            return response.json()
-        else:
-            raise RuntimeError(f"Unexpected response: {response}")
+        if self.snapshot:
+            data = self.snapshot.response(path)
+            if data is None:
+                raise RuntimeError(f"{path} is not in snapshot {self.snapshot.path}")
+            return data
+        if not self.cache:
+            return self._request('GET', path)
+        key = self.cache.key(self.api_endpoint, path, self.api_token)
+        data = self.cache.get(key, path)
+        if data is None:
+            data = self._request('GET', path)
+            self.cache.put(key, path, data)
+        return data
 
     def post(self, path, body):
-        url = f"{self.api_endpoint}{path}"
-        response = requests.post(url, json=body, headers={"X-Authentication-Token": self.api_token})
-        if response.status_code == requests.codes.ok:
-            return response.json()
-        else:
-            raise RuntimeError(f"Unexpected response: {response}")
+        self._invalidate_cache_for(path)
+        return self._request('POST', path, body=body)
 
     def patch(self, path, body):
+        self._invalidate_cache_for(path)
+        return self._request('PATCH', path, body=body)
+
+    def _invalidate_cache_for(self, path):
+        """
+        A write to /collection/:id/action may change anything cached under /collection
+        """
+        if self.cache:
+            collection_path = path.rsplit('/', 2)[0]
+            self.cache.invalidate(f"{self.api_endpoint}{collection_path}")
+
+    def _request(self, method, path, body=None):
+        if self.snapshot:
+            raise RuntimeError(f"Cannot {method} {path} when working from a snapshot")
         url = f"{self.api_endpoint}{path}"
-        response = requests.patch(url, json=body, headers={"X-Authentication-Token": self.api_token})
-        if response.status_code == requests.codes.ok:
-            return response.json()
-        else:
-            raise RuntimeError(f"Unexpected response: {response}")
+        for attempt in range(self.MAX_RETRIES + 1):
+            self.rate_limit.wait_if_exhausted()
+            with api_stats.timer('zenhub', method, path) as measurement:
+                response = self.session.request(method, url, json=body)
+                measurement['bytes'] = len(response.content)
+            self.rate_limit.update(response.headers)
+            api_stats.record_rate_limit('zenhub', self.rate_limit.remaining, self.rate_limit.limit)
+            if response.status_code == requests.codes.ok:
+                return response.json()
+            if response.status_code not in self.RATE_LIMITED_STATUS_CODES or attempt == self.MAX_RETRIES:
+                break
+            self.rate_limit.backoff(attempt)
+        raise RuntimeError(f"Unexpected response: {response}")
+
+    class RateLimit:
+        """
+        Track ZenHub's X-RateLimit-* response headers and pace requests so we
+        sleep until the window resets instead of being rejected.
+
+        Once a window is used up it stays so until its reset time, and requests asking for one meanwhile
+        are each given a place in a later window, at most limit per window, so waiting threads and
+        coroutines don't all go at once when the window resets.
+        """
+
+        BACKOFF_BASE_SECONDS = 2
+        BACKOFF_MAX_SECONDS = 60
+        WINDOW_SECONDS = 60  # how long ZenHub's rate limit windows last
+
+        def __init__(self):
+            self.limit = None
+            self.used = None
+            self.reset_at = None
+            self._queued = 0  # requests given a place in the windows after the current one
+            self._lock = threading.Lock()
+
+        def __str__(self):
+            return f"{self.__class__.__name__}(used={self.used}, limit={self.limit}, reset_at={self.reset_at}, " \
+                   f"queued={self._queued})"
+
+        @property
+        def remaining(self):
+            if self.limit is None or self.used is None:
+                return None
+            return self.limit - self.used
+
+        def update(self, headers):
+            with self._lock:
+                try:
+                    limit = int(headers['X-RateLimit-Limit'])
+                    used = int(headers['X-RateLimit-Used'])
+                    reset_at = float(headers['X-RateLimit-Reset'])
+                except (KeyError, ValueError):
+                    return
+                self.limit = limit
+                if self.reset_at is not None and self.used is not None:
+                    if reset_at > self.reset_at:
+                        self._start_next_windows(max(round((reset_at - self.reset_at) / self.WINDOW_SECONDS), 1))
+                    # requests we have let go may not have reached ZenHub yet
+                    used = max(used, self.used)
+                self.used = used
+                self.reset_at = reset_at
+
+        def wait_if_exhausted(self):
+            delay = self.seconds_until_available()
+            if delay > 0:
+                time.sleep(delay)
+
+        def seconds_until_available(self):
+            """
+            Reserve a request from the current window, or else a place in a later one.
+            :return: how long to wait before sending it, 0 if it can go now
+            """
+            with self._lock:
+                now = time.time()
+                if self.reset_at is not None and self.used is not None and self.reset_at <= now:
+                    self._start_next_windows(int((now - self.reset_at) // self.WINDOW_SECONDS) + 1)
+                if self.remaining is None or self.remaining > 0:
+                    if self.used is not None:
+                        self.used += 1
+                    return 0
+                windows_ahead = self._queued // self.limit if self.limit > 0 else 0
+                self._queued += 1
+                delay = self.reset_at - now + windows_ahead * self.WINDOW_SECONDS
+            return max(delay, 0)
+
+        def _start_next_windows(self, windows_passed):
+            """
+            Move on windows_passed windows, counting in the new current one the requests queued for it
+            """
+            per_window = max(self.limit, 1)
+            self._queued = max(self._queued - (windows_passed - 1) * per_window, 0)
+            self.used = min(self._queued, per_window)
+            self._queued -= self.used
+            self.reset_at += windows_passed * self.WINDOW_SECONDS
+
+        def backoff(self, attempt):
+            time.sleep(self.backoff_seconds(attempt))
+
+        def backoff_seconds(self, attempt):
+            """
+            How long to wait after a rejected request: until the advertised reset if it is still to come,
+            otherwise exponentially.
+            """
+            delay = self.BACKOFF_BASE_SECONDS * (2 ** attempt)
+            with self._lock:
+                if self.reset_at is not None and self.reset_at > time.time():
+                    delay = max(self.reset_at - time.time(), 1)
+            return min(delay, self.BACKOFF_MAX_SECONDS)
 
     class Repo:
         def __init__(self, repo_id, zenhub):
@@ -84,7 +260,10 @@ class ZenHub:
             return f"{self.__class__.__name__}[{self.id}]"
 
         def issue(self, issue_id):
-            data = self.zenhub.get(f"/p1/repositories/{self.id}/issues/{issue_id}")
+            board = self.zenhub.loaded_board(self.id)
+            data = board.issue_data(issue_id) if board else None
+            if data is None:
+                data = self.zenhub.get(f"/p1/repositories/{self.id}/issues/{issue_id}")
             return ZenHub.Issue(data, id=issue_id, repo=self)
 
         def epics(self):
@@ -99,8 +278,18 @@ class ZenHub:
             return ZenHub.Epic(data, id=epic_id, repo=self)
 
         def board(self):
-            data = self.zenhub.get(f"/p1/repositories/{self.id}/board")
-            return ZenHub.Board(data, repo=self)
+            return self.zenhub.board(self.id)
+
+        def dependencies(self):
+            """
+            :return: list of (blocking, blocked) pairs of (repo_id, issue_number), for the repo's dependencies
+            """
+            data = self.zenhub.get(f"/p1/repositories/{self.id}/dependencies")
+            return [
+                ((dependency['blocking']['repo_id'], dependency['blocking']['issue_number']),
+                 (dependency['blocked']['repo_id'], dependency['blocked']['issue_number']))
+                for dependency in data['dependencies']
+            ]
 
         def releases(self):
             data = self.zenhub.get(f"/p1/repositories/{self.id}/reports/releases")
@@ -130,20 +319,44 @@ class ZenHub:
         def title(self):
             return self.data['title']
 
+        def issue_keys(self):
+            """
+            :return: set of (repo_id, issue_number) of the issues already in this release
+            """
+            data = self.zenhub.get(f"/p1/reports/release/{self.id}/issues")
+            return {(issue_data['repo_id'], issue_data['issue_number']) for issue_data in data}
+
         def add_issues(self, issues):
+            return self.update_issues(add=[(issue.repo.id, issue.number) for issue in issues])
+
+        def update_issues(self, add=(), remove=()):
+            """
+            :param add: iterable of (repo_id, issue_number) to add to the release
+            :param remove: iterable of (repo_id, issue_number) to remove from the release
+            """
             path = f"/p1/reports/release/{self.id}/issues"
-            issue_data = [{'repo_id': issue.repo.id, 'issue_number': issue.number} for issue in issues]
-            body = {'add_issues': issue_data, 'remove_issues': []}
+            body = {
+                'add_issues': [{'repo_id': repo_id, 'issue_number': number} for repo_id, number in add],
+                'remove_issues': [{'repo_id': repo_id, 'issue_number': number} for repo_id, number in remove]
+            }
             return self.zenhub.patch(path, body=body)
 
     class Issue:
+        """
+        Only the fields we use are kept from the issue's data, as there may be very many issues
+        """
+        __slots__ = ('repo', 'id', 'pipeline', 'estimate')
+
         def __init__(self, issue_data, id, repo):
             self.repo = repo
-            self.data = issue_data
             self.id = id
+            pipeline = (issue_data.get('pipeline') or {}).get('name')
+            self.pipeline = sys.intern(pipeline) if pipeline else None
+            self.estimate = (issue_data.get('estimate') or {}).get('value')
 
         def __str__(self):
-            return f"{self.__class__.__name__}[{self.repo.id}/{self.id}]: {self.data}"
+            return f"{self.__class__.__name__}[{self.repo.id}/{self.id}]: " \
+                   f"pipeline={self.pipeline}, estimate={self.estimate}"
 
         @property
         def repo_id(self):
@@ -154,6 +367,8 @@ class ZenHub:
             return self.id
 
     class Epic:
+        __slots__ = ('repo', 'data', 'id')
+
         def __init__(self, issue_data, id, repo):
             self.repo = repo
             self.data = issue_data
@@ -173,6 +388,11 @@ class ZenHub:
             return self.data['issues']
 
         def issues(self):
+            """
+            Uses the board of each repo involved, so only issues missing from those boards are fetched one by one
+            """
+            for repo_id in dict.fromkeys(issue_data['repo_id'] for issue_data in self.data['issues']):
+                self.repo.zenhub.board(repo_id)
             return [
                 self.repo.zenhub.repository(issue_data['repo_id']).issue(issue_data['issue_number'])
                 for issue_data in self.data['issues']
@@ -186,9 +406,12 @@ class ZenHub:
             self.repo.zenhub.post(path, body)
 
     class Board:
+        __slots__ = ('repo', 'data', '_issue_index')
+
         def __init__(self, data, repo):
             self.repo = repo
             self.data = data
+            self._issue_index = None  # issue number -> (pipeline, issue data), built on first use
 
         def __str__(self):
             return f"{self.__class__.__name__}[{self.repo.id}]\n" + json.dumps(self.data, indent=4)
@@ -197,4 +420,21 @@ class ZenHub:
             return self.data['pipelines']
 
         def pipeline(self, name):
-            return self.pipelines().get(name)
+            return next((pipeline for pipeline in self.pipelines() if pipeline['name'] == name), None)
+
+        def issue_data(self, issue_number):
+            """
+            :return: the issue's data in the form returned by GET /p1/repositories/:repo_id/issues/:issue_number,
+                     or None if the issue is not on the board
+            """
+            if self._issue_index is None:
+                index = dict()
+                for pipeline in self.pipelines():
+                    for issue_data in pipeline['issues']:
+                        index[int(issue_data['issue_number'])] = (pipeline, issue_data)
+                self._issue_index = index
+            found = self._issue_index.get(int(issue_number))
+            if found is None:
+                return None
+            pipeline, issue_data = found
+            return dict(issue_data, pipeline={'name': pipeline['name'], 'pipeline_id': pipeline.get('id')})
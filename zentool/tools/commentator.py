@@ -1,7 +1,24 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 from . import output
 
 
 class Commentator:
+    """
+    Comment on every open issue attached to an epic.
+
+    Issues are checked concurrently, but comments are created no faster than one per
+    MIN_SECONDS_BETWEEN_COMMENTS, as GitHub's secondary rate limits punish bursts of
+    content creation.  Issues that already carry an identical comment are skipped,
+    so re-running after a partial failure doesn't double-post.
+    """
+
+    MAX_WORKERS = 4
+    MIN_SECONDS_BETWEEN_COMMENTS = 1.0
+    MAX_RETRIES = 3
+    DEFAULT_RETRY_AFTER_SECONDS = 60
 
     @classmethod
     def configure(cls, subparsers):
@@ -12,15 +29,67 @@ class Commentator:
 
     def __init__(self, combo):
         self.combo = combo
+        self._last_comment_time = 0
+        self._comment_lock = threading.Lock()
 
     def run(self, args):
         repo = self.combo.repo(args.repo_name)
         epic = repo.epic(args.epic_id)
         print(epic)
-        for issue in epic.issues():
-            output(f"{issue}...")
-            if issue.status == "open":
-                issue.gh_issue.create_comment(args.comment)
-                output(" commenting.\n")
-            else:
-                output(f" is {issue.status}, skipping.\n")
+        issues = epic.issues(hydrate=True)
+        with ThreadPoolExecutor(max_workers=self.MAX_WORKERS) as executor:
+            results = executor.map(lambda issue: self._comment_on(issue, args.comment), issues)
+            for issue, result in zip(issues, results):
+                output(f"{issue}... {result}\n")
+
+    def _comment_on(self, issue, comment):
+        """
+        :return: a description of what was done, for output
+        """
+        from github import GithubException
+        if issue.status != "open":
+            return f"is {issue.status}, skipping."
+        try:
+            if any(existing.body == comment for existing in issue.gh_issue.get_comments()):
+                return "already has this comment, skipping."
+            self._create_comment(issue, comment)
+            return "commenting."
+        except GithubException as e:
+            return f"FAILED: {e}"
+
+    def _create_comment(self, issue, comment):
+        from github import GithubException
+        for attempt in range(self.MAX_RETRIES + 1):
+            self._wait_for_comment_slot()
+            try:
+                return issue.gh_issue.create_comment(comment)
+            except GithubException as e:
+                retry_after = self._rate_limit_retry_after(e)
+                if retry_after is None or attempt == self.MAX_RETRIES:
+                    raise
+                time.sleep(retry_after)
+
+    def _rate_limit_retry_after(self, e):
+        """
+        :return: seconds to wait before retrying, if e is a rate-limit error, otherwise None,
+                 e.g. for a 403 due to missing permissions or a locked issue
+        """
+        if e.status not in (403, 429):
+            return None
+        headers = {name.lower(): value for name, value in (getattr(e, 'headers', None) or {}).items()}
+        if 'retry-after' in headers:
+            return int(headers['retry-after'])
+        if headers.get('x-ratelimit-remaining') == '0':
+            reset_at = headers.get('x-ratelimit-reset')
+            return max(int(reset_at) - time.time(), 1) if reset_at else self.DEFAULT_RETRY_AFTER_SECONDS
+        message = e.data.get('message', '') if isinstance(e.data, dict) else str(e.data or '')
+        if 'secondary rate limit' in message.lower():
+            return self.DEFAULT_RETRY_AFTER_SECONDS
+        return None
+
+    def _wait_for_comment_slot(self):
+        with self._comment_lock:
+            delay = self._last_comment_time + self.MIN_SECONDS_BETWEEN_COMMENTS - time.time()
+            if delay > 0:
+                time.sleep(delay)
+            self._last_comment_time = time.time()
@@ -1,5 +1,3 @@
-from colored import fg, bg, attr
-
 from .spreadsheet_processor import SpreadsheetProcessor
 from ..lib.sheet_range import SheetRange
 
@@ -9,6 +7,9 @@ class IssueCreator:
     usage: zentool -r <repo> spreadsheet <spreadsheet_id> create-issues
 
     Create an issue for every 🛠 in tracking spreadsheet.
+
+    The cell of each issue created is written to the sheet straight away, rather than batched with other
+    updates, so a failure later in the run can't leave a 🛠 behind for an issue that already exists.
     """
 
     @classmethod
@@ -16,6 +17,10 @@ class IssueCreator:
         sync_parser = subparsers.add_parser('create-issues')
         sync_parser.set_defaults(subcommand='create-issues')
         sync_parser.add_argument('epic_id', type=str, nargs='?')
+        sync_parser.add_argument('--jobs', type=int, default=1,
+                                 help="number of rows to fetch data for concurrently")
+        sync_parser.add_argument('--only-changed', action='store_true',
+                                 help="only write cells whose contents or colour have changed")
 
     def __init__(self, tools):
         self.tools = tools
@@ -36,10 +41,20 @@ class IssueCreator:
             self.epic = None
             self.row_range = SheetRange()
 
+        def prefetch(self, row, row_number):
+            """
+            Fetch the epic for this row.  May be run on a worker thread.
+            """
+            self.epic = self.sheet_processor.repo.epic(row[0])
+            self.epic.title
+            self.epic.body
+
         def process(self, row, row_number):
             self.row = row
             self.row_number = row_number
-            self._find_and_update_epic(epic_number=row[0])
+            if not self.epic:
+                self.prefetch(row, row_number)
+            self._update_epic()
 
             for map_entry in self.sheet_processor.repo_map.map.values():
                 try:
@@ -51,14 +66,15 @@ class IssueCreator:
                     issue = map_entry.repo.create_issue(self.epic.title, self.epic.body)
                     print(f"\tCreated issue {issue}")
                     self.update_issue_in_sheet(issue, map_entry)
+                    self.sheet_processor.update_now(self.row_range)
+                    self.row_range = SheetRange()
                     print("\tAdding issue to epic")
                     self.epic.add_issues([issue])
 
             if not self.row_range.is_empty:
-                self.sheet.update_range(self.row_range)
+                self.sheet_processor.queue_update(self.row_range)
 
-        def _find_and_update_epic(self, epic_number):
-            self.epic = self.sheet_processor.repo.epic(epic_number)
+        def _update_epic(self):
             print(self.epic)
             self.row_range['B', self.row_number] = self.epic.title
 
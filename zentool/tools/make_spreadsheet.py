@@ -5,7 +5,10 @@ class MakeSpreadsheet:
     """
     usage: zentool -r <repo> spreadsheet <spreadsheet_id> make
 
-    Dump the epics from a ZenHub repo into a spreadsheet
+    Dump the epics from a ZenHub repo into a spreadsheet.
+
+    Titles and states of all the epics come from one paginated listing of the repo's open issues,
+    rather than a GitHub request per epic.
     """
 
     @classmethod
@@ -30,9 +33,12 @@ class MakeSpreadsheet:
         range['B', 2] = "Description"
         # TODO: format these headings
 
+        open_issues = self.repo.issues_data(state='open')
         row_cursor = 3  # 1-based
         for epic in self.repo.epics():
-            if epic.status == 'open':
+            gh_data = open_issues.get(int(epic.number))
+            if gh_data:
+                epic.gh_data = gh_data
                 print(f"Epic: {epic.number}, {epic.title}")
                 range['A', row_cursor] = epic.number
                 range['B', row_cursor] = epic.title
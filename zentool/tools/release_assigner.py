@@ -1,19 +1,31 @@
+from zentool.lib.google_sheet import GoogleSheet
 from . import output
+from .spreadsheet_processor import SpreadsheetProcessor
+from .spreadsheet_tools import SpreadsheetTools
 
 
 class ReleaseAssigner:
     """
     export GITHUB_API_TOKEN=x ZENHUB_API_TOKEN=y
-    zentool -r HumanCellAtlas/dcp release <epic_id> "General Availability"
+    zentool -r HumanCellAtlas/dcp release <epic_id>[,<epic_id>...] "General Availability"
+    zentool -r HumanCellAtlas/dcp release --sheet <spreadsheet_id> "General Availability"
+
+    Issues are de-duplicated across epics, issues already in the release are skipped,
+    and the rest are added in chunks of ADD_CHUNK_SIZE per request.
     """
 
+    ADD_CHUNK_SIZE = 100
+
     @classmethod
     def configure(cls, subparsers):
         assigner_parser = subparsers.add_parser('release', description="Assign all tickets attached to epic to release")
         assigner_parser.set_defaults(command='release')
-        assigner_parser.add_argument('epic_id', type=str)
+        assigner_parser.add_argument('epic_ids', type=str, nargs='?',
+                                     help="comma-separated list of epic IDs")
         assigner_parser.add_argument('release_name', type=str,
                                      help="name of release to assign epic issues to (use quotes if spaces)")
+        assigner_parser.add_argument('--sheet', type=str, metavar='SPREADSHEET_ID',
+                                     help="use every epic listed in this tracking spreadsheet")
 
     def __init__(self, combo):
         self.combo = combo
@@ -22,8 +34,6 @@ class ReleaseAssigner:
         release_name = args.release_name
         repo = self.combo.repo(args.repo_name)
         print(repo)
-        epic = repo.epic(args.epic_id)
-        print(epic)
         releases = repo.zen.releases()
         release_names = [rel.title for rel in releases]
         if release_name not in release_names:
@@ -31,14 +41,47 @@ class ReleaseAssigner:
             exit(1)
         release = [rel for rel in releases if rel.title == release_name][0]
         print(release)
-        for issue in epic.issues():
+
+        issue_keys = []
+        for epic_id in self._epic_ids(args, repo):
+            epic = repo.epic(epic_id)
+            epic_issue_keys = [(issue_data['repo_id'], issue_data['issue_number']) for issue_data in epic.raw_issues()]
+            print(f"Epic {epic.number}: {len(epic_issue_keys)} issues")
+            issue_keys.extend(epic_issue_keys)
+        issue_keys = list(dict.fromkeys(issue_keys))
+
+        already_in_release = release.issue_keys()
+        to_add = [key for key in issue_keys if key not in already_in_release]
+        print(f"{len(issue_keys)} distinct issues, {len(issue_keys) - len(to_add)} already in {release}")
+        for start in range(0, len(to_add), self.ADD_CHUNK_SIZE):
+            chunk = to_add[start:start + self.ADD_CHUNK_SIZE]
             try:
-                output(f"Adding {issue} to {release}...")
-                resp = release.add_issues([issue])
+                output(f"Adding {len(chunk)} issues to {release}...")
+                resp = release.update_issues(add=chunk)
                 if resp == {'added': [], 'removed': []}:
                     print("NO CHANGE")
-                elif len(resp['added']) > 0:
-                    print("SUCCESS")
+                else:
+                    print(f"SUCCESS ({len(resp['added'])} added)")
             except Exception as e:
                 print(f"FAILED: {e}")
 
+    def _epic_ids(self, args, repo):
+        if args.sheet:
+            return self._epic_ids_from_sheet(args.sheet, repo.full_name)
+        if not args.epic_ids:
+            raise RuntimeError("You must supply epic IDs or --sheet")
+        return [epic_id.strip() for epic_id in args.epic_ids.split(',') if epic_id.strip()]
+
+    @staticmethod
+    def _epic_ids_from_sheet(spreadsheet_id, repo_full_name):
+        """
+        :return: the epic numbers in column A of a tracking spreadsheet, which must be the one for repo_full_name
+        """
+        SpreadsheetTools.check_google_auth_is_configured()
+        sheet = GoogleSheet(spreadsheet_id)
+        first_row, window_rows = SpreadsheetProcessor.DATA_START_ROW, SpreadsheetProcessor.WINDOW_ROWS
+        headings, first_window = sheet.get_cells_batch(
+            [SpreadsheetProcessor.HEADINGS_RANGE, f"A{first_row}:A{first_row + window_rows - 1}"])
+        SpreadsheetProcessor.check_sheet_matches_repo(headings, repo_full_name)
+        rows = sheet.iter_rows(first_row, 'A', 'A', window_rows=window_rows, first_window=first_window)
+        return [row[0] for row_number, row in rows if row and row[0]]
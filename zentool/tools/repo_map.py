@@ -1,6 +1,10 @@
+import threading
+
+
 class RepoMap:
     """
-    Maintains a map of repo numbers to the repos and their spreadsheet columns
+    Maintains a map of repo numbers to the repos and their spreadsheet columns.
+    Safe to share between threads.
     """
 
     class RepoMapEntry:
@@ -13,7 +17,9 @@ class RepoMap:
 
     def __init__(self):
         self.map = dict()
+        self._by_repo_name = dict()
         self.next_available_column = 3
+        self._lock = threading.RLock()
 
     def __str__(self):
         output = "RepoMap "
@@ -22,19 +28,34 @@ class RepoMap:
         return output
 
     def record(self, repo, column):
-        entry = self.RepoMapEntry(repo=repo, column=column)
-        self.map[repo.id] = entry
-        self.next_available_column = max(self.next_available_column, column + 1)
-        return entry
+        with self._lock:
+            entry = self.RepoMapEntry(repo=repo, column=column)
+            self.map[repo.id] = entry
+            self._by_repo_name[repo.full_name] = entry
+            self.next_available_column = max(self.next_available_column, column + 1)
+            return entry
 
     def create_new(self, repo):
-        column = self.next_available_column
-        self.next_available_column += 1
-        entry = self.record(repo=repo, column=column)
-        return entry
+        with self._lock:
+            column = self.next_available_column
+            self.next_available_column += 1
+            entry = self.record(repo=repo, column=column)
+            return entry
+
+    def reserve_column(self, column=None):
+        """
+        Keep a column, e.g. one the sheet uses for something other than a repo, from being given to a repo
+        :param column: the column to reserve, or None for the next available one
+        :return: the column reserved
+        """
+        with self._lock:
+            if column is None:
+                column = self.next_available_column
+            self.next_available_column = max(self.next_available_column, column + 1)
+            return column
 
     def get_by_repo_name(self, repo_name):
-        for entry in self.map.values():
-            if entry.repo.full_name == repo_name:
-                return entry
-        return None
+        return self._by_repo_name.get(repo_name)
+
+    def get_by_repo_id(self, repo_id):
+        return self.map.get(repo_id)
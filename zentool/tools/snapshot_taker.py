@@ -0,0 +1,65 @@
+from . import output
+from ..lib.snapshot import Snapshot
+
+
+class SnapshotTaker:
+    """
+    usage: zentool -r <repo> snapshot <file>
+
+    Save a repo's epics, the issues attached to them, the boards and dependencies of every repo involved
+    and the repo's releases to a local file.  Other commands can then be run against it with
+    zentool --snapshot <file> ..., making no ZenHub or GitHub requests.
+    """
+
+    @classmethod
+    def configure(cls, subparsers):
+        snapshot_parser = subparsers.add_parser('snapshot',
+                                                description="Save epics, issues, boards and releases to a local file")
+        snapshot_parser.set_defaults(command='snapshot')
+        snapshot_parser.add_argument('snapshot_path', type=str, metavar='FILE')
+
+    def __init__(self, combo):
+        self.combo = combo
+        self.snapshot = None
+
+    def run(self, args):
+        if self.combo.snapshot:
+            raise RuntimeError("Cannot take a snapshot when working from one")
+        repo = self.combo.repo(args.repo_name)
+        print(repo)
+        self.snapshot = Snapshot(args.snapshot_path, create=True)
+
+        self._record_response(f"/p1/repositories/{repo.id}/epics")
+        epics = repo.epics()
+        output(f"Fetching {len(epics)} epics and their issues...")
+        self.combo.prefetch_epics(epics)
+        issues = [issue for epic in epics for issue in epic.issues()]
+        print(f" {len(issues)} issues.")
+        for epic in epics:
+            self.snapshot.record_response(f"/p1/repositories/{repo.id}/epics/{epic.number}", epic.zh_epic.data)
+        for item in epics + issues:
+            if item.gh_data:
+                self.snapshot.record_issue(item.repo.id, item.number, item.gh_data)
+
+        repos = list({repo.id: repo, **{issue.repo.id: issue.repo for issue in issues}}.values())
+        output(f"Fetching boards and dependencies of {len(repos)} repos...")
+        for board_repo in repos:
+            self.snapshot.record_repo(board_repo.id, board_repo.full_name)
+            self._record_response(f"/p1/repositories/{board_repo.id}/board")
+            self._record_response(f"/p1/repositories/{board_repo.id}/dependencies")
+        print(" done.")
+
+        releases = self._record_response(f"/p1/repositories/{repo.id}/reports/releases")
+        output(f"Fetching {len(releases)} releases...")
+        for release_data in releases:
+            self._record_response(f"/p1/reports/release/{release_data['release_id']}")
+            self._record_response(f"/p1/reports/release/{release_data['release_id']}/issues")
+        print(" done.")
+
+        self.snapshot.finish(repo_name=repo.full_name)
+        print(f"Wrote {self.snapshot}")
+
+    def _record_response(self, path):
+        data = self.combo.zenhub.get(path)
+        self.snapshot.record_response(path, data)
+        return data
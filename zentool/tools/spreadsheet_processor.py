@@ -1,21 +1,51 @@
+import collections
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+
 from .repo_map import RepoMap
+from ..lib.sheet_range import SheetRange
 
 
 class SpreadsheetProcessor:
     """
-    Iterate through spreadsheet rows, calling the provided row processor
+    Iterate through spreadsheet rows, calling the provided row processor.
+
+    Rows are read WINDOW_ROWS at a time, the next window being read while the current one is processed,
+    so memory use doesn't grow with the length of the sheet.  Empty rows are skipped.
+
+    With --jobs N, row processors that have a prefetch() method get their data fetched
+    by N worker threads, a few rows ahead, while process() is still called one row at a time, in row order,
+    so console output, column assignment and sheet writes are the same as a serial run.
+    With --async, the epics and issues of each window of rows are fetched up front with asyncio instead.
+
+    With --only-changed, the current contents of the header rows are read up front, and those of the data rows
+    a window at a time, as rows of that window are written, so only one window of them is held at a time.
+
+    A column headed BLOCKED_HEADING in the repo header row is never given to a repo.  With --blocked it
+    is the column row processors report blocked status in, and is added to the sheet if missing.
     """
 
     REPO_HEADER_ROW = 2
-    REPO_HEADING_RANGE = "C2:Z"
+    BLOCKED_HEADING = "Blocked by"
+    LAST_COLUMN = "ZZZ"  # the widest a Google Sheet can be
+    HEADINGS_RANGE = "A1:B2"
+    REPO_HEADING_RANGE = f"C2:{LAST_COLUMN}2"
     DATA_START_ROW = 3  # all spreadsheet references are 1-based
+    WINDOW_ROWS = 500
+    PREFETCH_ROWS_PER_JOB = 2  # how far ahead of process() the --jobs workers may get
 
-    def __init__(self, tools, row_processor_class):
+    def __init__(self, tools, row_processor_class, sync_state=None):
         self.args = None
         self.tools = tools
         self.repo = None
         self.repo_map = RepoMap()
         self.row_processor_class = row_processor_class
+        self.sync_state = sync_state
+        self.only_changed = False
+        self.current_header_cells = None  # with --only-changed, SheetRange of the rows above DATA_START_ROW
+        self.current_window = None  # with --only-changed, (first row, last row, SheetRange) of the last window read
+        self.blocked_heading_column = None
+        self.blocked_column = None  # set with --blocked
 
     @property
     def sheet(self):
@@ -24,36 +54,145 @@ class SpreadsheetProcessor:
     def run(self, args):
         self.args = args
         self.repo = self.tools.combo.repo(args.repo_name)
-        self._check_sheet_matches_repo()
-        self._read_repo_headings()
-        self._process_rows()
+        first_window_range = f"A{self.DATA_START_ROW}:{self.LAST_COLUMN}{self.DATA_START_ROW + self.WINDOW_ROWS - 1}"
+        headings, repo_headings, first_window = self.sheet.get_cells_batch(
+            [self.HEADINGS_RANGE, self.REPO_HEADING_RANGE, first_window_range])
+        self.check_sheet_matches_repo(headings, self.repo.full_name)
+        self._read_repo_headings(repo_headings)
+        self.keep_boards_of_every_repo()
+        if getattr(args, 'blocked', False):
+            self._use_blocked_column()
+        if self.sync_state:
+            repo_names = [self.repo.full_name] + [entry.repo.full_name for entry in self.repo_map.map.values()]
+            self.sync_state.start_sync(self.tools.combo, repo_names)
+        if getattr(args, 'only_changed', False):
+            self.only_changed = True
+            self.current_header_cells = self.sheet.get_sheet_range(f"A1:{self.LAST_COLUMN}{self.DATA_START_ROW - 1}")
+        try:
+            self._process_rows(first_window)
+        finally:
+            self.sheet.flush()
+        if self.sync_state:
+            self.sync_state.finish_sync(complete=not self.args.epic_id)
+
+    def keep_boards_of_every_repo(self):
+        """
+        Have ZenHub keep the board of the tracker repo and of every repo with a column
+        """
+        self.tools.combo.zenhub.keep_boards(len(self.repo_map.map) + 1)
+
+    def queue_update(self, cells):
+        """
+        Queue cells to be written to the sheet.  In --only-changed mode only cells
+        that differ from what the sheet contained at the start of the run are written.
+        """
+        if not self.only_changed or cells.is_empty:
+            self.sheet.queue_update(cells)
+            return
+        for changed_range in cells.changed_ranges(self._current_cells_for(cells)):
+            self.sheet.queue_update(changed_range)
+
+    def update_now(self, cells):
+        """
+        Write cells to the sheet at once, along with any updates queued before them
+        """
+        self.queue_update(cells)
+        self.sheet.flush()
 
-    def _check_sheet_matches_repo(self):
-        headings = self.sheet.get_cells("A1:B2")
+    def _current_cells_for(self, cells):
+        """
+        :return: a SheetRange of the current contents of the sheet rows cells are in, reading the window
+                 of rows starting at cells' first row if it isn't the window last read.  Rows are written in order,
+                 so the window last read is dropped.
+        """
+        if cells.highest_row < self.DATA_START_ROW:
+            return self.current_header_cells
+        if self.current_window is not None:
+            first_row, last_row, current_cells = self.current_window
+            if first_row <= cells.lowest_row and cells.highest_row <= last_row:
+                return current_cells
+        first_row = cells.lowest_row
+        last_row = max(cells.highest_row, first_row + self.WINDOW_ROWS - 1)
+        current_cells = self.sheet.get_sheet_range(f"A{first_row}:{self.LAST_COLUMN}{last_row}")
+        self.current_window = (first_row, last_row, current_cells)
+        return current_cells
+
+    @staticmethod
+    def check_sheet_matches_repo(headings, repo_full_name):
+        """
+        :param headings: the values of HEADINGS_RANGE, which should name the repo the sheet tracks
+        """
+        assert len(headings) == 2 and len(headings[0]) == 2 and len(headings[1]) == 2, \
+            "Expected cells A1:B2 to contain 'Repo:', the repo name, 'Epic' and 'Description'."
         assert headings[0][0] == 'Repo:', "Expected Cell A1 to contain the word 'Repo:'."
-        assert headings[0][1] == self.repo.full_name, (
-            f"Command line specified repo {self.repo.full_name} "
+        assert headings[0][1] == repo_full_name, (
+            f"Command line specified repo {repo_full_name} "
             f"but spreadsheet is for repo {headings[0][1]}.")
         assert headings[1][0] == 'Epic', "Expected cell A2 to contain the heading 'Epic'."
         assert headings[1][1] == 'Description', "Expected cell B2 to contain the heading 'Description'."
 
-    def _read_repo_headings(self):
-        cells = self.sheet.get_cells(self.REPO_HEADING_RANGE)
+    def _read_repo_headings(self, cells):
         if len(cells) == 0:
             return
         row = cells[0]
         col_number = 2  # 0-based
         for repo_name in row:
             col_number += 1
-            if not self.repo_map.get_by_repo_name(repo_name):
+            if repo_name == self.BLOCKED_HEADING:
+                self.blocked_heading_column = self.repo_map.reserve_column(col_number)
+            elif not self.repo_map.get_by_repo_name(repo_name):
                 repo = self.tools.combo.repo(repo_name)
                 self.repo_map.record(repo, col_number)
 
-    def _process_rows(self):
-        row_number = self.DATA_START_ROW - 1
-        sheet_data = self.sheet.get_cells(f"A{self.DATA_START_ROW}:Z9999")
-        for row in sheet_data:
-            row_number += 1
-            if self.args.epic_id and row[0] != self.args.epic_id:
-                continue
-            self.row_processor_class(sheet_processor=self).process(row, row_number)
+    def _use_blocked_column(self):
+        self.blocked_column = self.blocked_heading_column
+        if self.blocked_column is None:
+            self.blocked_column = self.repo_map.reserve_column()
+            print(f"assigning column {self.blocked_column} to {self.BLOCKED_HEADING}")
+            heading = SheetRange()
+            heading[self.tools.column_number_to_letter(self.blocked_column), self.REPO_HEADER_ROW] = \
+                self.BLOCKED_HEADING
+            self.sheet.queue_update(heading)
+
+    def _process_rows(self, first_window):
+        rows = (
+            (row, row_number)
+            for row_number, row in self.sheet.iter_rows(self.DATA_START_ROW, 'A', self.LAST_COLUMN,
+                                                        window_rows=self.WINDOW_ROWS, first_window=first_window)
+            if row and row[0] and (not self.args.epic_id or row[0] == self.args.epic_id)
+        )
+        if getattr(self.args, 'use_async', False):
+            rows = self._prefetched_with_asyncio(rows)
+        jobs = getattr(self.args, 'jobs', 1)
+        if jobs > 1 and hasattr(self.row_processor_class, 'prefetch'):
+            for row_processor, row, row_number in self._prefetched_with_threads(rows, jobs):
+                row_processor.process(row, row_number)
+        else:
+            for row, row_number in rows:
+                self.row_processor_class(sheet_processor=self).process(row, row_number)
+
+    def _prefetched_with_asyncio(self, rows):
+        while True:
+            window = list(itertools.islice(rows, self.WINDOW_ROWS))
+            if not window:
+                return
+            self.tools.combo.prefetch_epics(self.repo.epic(row[0]) for row, row_number in window)
+            yield from window
+
+    def _prefetched_with_threads(self, rows, jobs):
+        """
+        Yield (row_processor, row, row_number) in row order, prefetching at most a few rows per job ahead
+        """
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            pending = collections.deque()
+            for row, row_number in rows:
+                pending.append(executor.submit(self._prefetch_row, row, row_number))
+                if len(pending) >= jobs * self.PREFETCH_ROWS_PER_JOB:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+    def _prefetch_row(self, row, row_number):
+        row_processor = self.row_processor_class(sheet_processor=self)
+        row_processor.prefetch(row, row_number)
+        return row_processor, row, row_number
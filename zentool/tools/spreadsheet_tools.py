@@ -3,6 +3,7 @@ import sys
 
 
 from zentool.lib.google_sheet import GoogleSheet
+from zentool.lib import sheet_range
 from .make_spreadsheet import MakeSpreadsheet
 from .sync_spreadsheet import SyncSpreadsheet
 from .issue_creator import IssueCreator
@@ -25,7 +26,7 @@ class SpreadsheetTools:
     def __init__(self, combo):
         self.combo = combo
         self.sheet = None
-        self._check_google_auth_is_configured()
+        self.check_google_auth_is_configured()
 
     def run(self, args):
         self.sheet = GoogleSheet(args.spreadsheet_id)
@@ -47,10 +48,10 @@ class SpreadsheetTools:
         """
         column_number should be 1-based
         """
-        return chr(65 + column_number - 1)
+        return sheet_range.column_number_to_letter(column_number)
 
     @staticmethod
-    def _check_google_auth_is_configured():
+    def check_google_auth_is_configured():
         if not os.path.exists('credentials.json'):
             sys.stderr.write("\nYou need to get credentials for accessing the Google Sheets API.\n"
                              "Go to https://developers.google.com/sheets/api/quickstart/python\n"
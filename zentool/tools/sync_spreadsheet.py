@@ -1,6 +1,6 @@
-from colored import fg, bg, attr
-
 from .spreadsheet_processor import SpreadsheetProcessor
+from .sync_state import SyncState
+from ..lib.dependency_graph import DependencyGraph
 from ..lib.sheet_range import SheetRange
 
 
@@ -9,6 +9,9 @@ class SyncSpreadsheet:
     usage: zentool -r <repo> spreadsheet <spreadsheet_id> sync
 
     Retrieve issue status for epics
+
+    With --blocked, a "Blocked by" column lists the open issues outside each epic that block its open issues,
+    directly or through other issues, from each repo's ZenHub dependencies.
     """
 
     @classmethod
@@ -16,12 +19,24 @@ class SyncSpreadsheet:
         sync_parser = subparsers.add_parser('sync')
         sync_parser.set_defaults(subcommand='sync')
         sync_parser.add_argument('epic_id', type=str, nargs='?')
+        sync_parser.add_argument('--only-changed', action='store_true',
+                                 help="only write cells whose contents or colour have changed")
+        sync_parser.add_argument('--jobs', type=int, default=1,
+                                 help="number of rows to fetch data for concurrently")
+        sync_parser.add_argument('--async', dest='use_async', action='store_true',
+                                 help="fetch all epics and issues up front with concurrent asyncio requests")
+        sync_parser.add_argument('--incremental', action='store_true',
+                                 help="skip epics where nothing has changed since the last sync")
+        sync_parser.add_argument('--blocked', action='store_true',
+                                 help="list the open issues blocking each epic in a 'Blocked by' column")
 
     def __init__(self, tools):
         self.tools = tools
 
     def run(self, args):
-        SpreadsheetProcessor(tools=self.tools, row_processor_class=self.SyncRowIssues).run(args)
+        sync_state = SyncState(args.spreadsheet_id) if args.incremental else None
+        SpreadsheetProcessor(tools=self.tools, row_processor_class=self.SyncRowIssues,
+                             sync_state=sync_state).run(args)
 
     class SyncRowIssues:
 
@@ -34,24 +49,85 @@ class SyncSpreadsheet:
             self.row = None
             self.row_number = None
             self.epic = None
+            self.issues = None
+            self.unchanged = False
+            self.blockers = None
+            self.critical_path = None
+            self.dependency_cycle = None
             self.header_range = SheetRange()
             self.row_range = SheetRange()
 
+        def prefetch(self, row, row_number):
+            """
+            Fetch everything needed to process this row.  May be run on a worker thread,
+            so must not print, touch the RepoMap or write to the sheet.
+            """
+            self.epic = self.sheet_processor.repo.epic(row[0])
+            sync_state = self.sheet_processor.sync_state
+            if sync_state and sync_state.is_unchanged(self.epic):
+                self.unchanged = True
+                return
+            self.epic.title
+            self.issues = self.epic.issues(hydrate=True)
+            if self.sheet_processor.blocked_column is not None:
+                self._find_blockers()
+
         def process(self, row, row_number):
             self.row = row
             self.row_number = row_number
-            self._find_and_update_epic(epic_number=row[0])
-            for issue in self.epic.issues():
+            if not self.epic:
+                self.prefetch(row, row_number)
+            if self.unchanged:
+                print(f"Epic {self.epic.number} unchanged since last sync")
+                return
+            self._update_epic()
+            for issue in self.issues:
                 print(f"\t{issue}")
                 map_entry = self._find_or_create_column_for_repo(issue.repo)
                 self._update_issue_in_sheet(issue, map_entry)
+            if self.blockers is not None:
+                self._update_blocked_in_sheet()
             if not self.header_range.is_empty:
-                self.sheet.update_range(self.header_range)
+                self.sheet_processor.queue_update(self.header_range)
             if not self.row_range.is_empty:
-                self.sheet.update_range(self.row_range)
-
-        def _find_and_update_epic(self, epic_number):
-            self.epic = self.sheet_processor.repo.epic(epic_number)
+                self.sheet_processor.queue_update(self.row_range)
+            if self.sheet_processor.sync_state:
+                self.sheet_processor.sync_state.record_epic(self.epic, self.issues)
+
+        def _find_blockers(self):
+            """
+            The open issues outside the epic blocking its open issues, and the longest chain of blockers
+            """
+            combo = self.sheet_processor.tools.combo
+            graph = combo.dependency_graph
+            epic_keys = {(issue.repo.id, int(issue.number)) for issue in self.issues}
+            open_keys = [(issue.repo.id, int(issue.number)) for issue in self.issues if issue.status != 'closed']
+            blockers = [combo.repo(repo_id).issue(number)
+                        for repo_id, number in sorted(graph.all_blocked_by(open_keys) - epic_keys)]
+            self.blockers = [issue for issue in combo.hydrate_issues(blockers) if issue.status != 'closed']
+            try:
+                self.critical_path = graph.critical_path(open_keys)
+            except DependencyGraph.CycleError as e:
+                self.critical_path = []
+                self.dependency_cycle = e.keys
+
+        def _update_blocked_in_sheet(self):
+            colname = self.sheet_processor.tools.column_number_to_letter(self.sheet_processor.blocked_column)
+            self.row_range[colname, self.row_number] = ", ".join(
+                f"{issue.repo.full_name}#{issue.number}" for issue in self.blockers)
+            if self.blockers:
+                print(f"\tblocked by {len(self.blockers)} open issues")
+                self.row_range[colname, self.row_number].bg = {'red': 255, 'green': 200, 'blue': 200}
+            if self.dependency_cycle:
+                print("\tdependency cycle, so no critical path, among: " + ", ".join(
+                    f"{self.sheet_processor.tools.combo.repo(repo_id).full_name}#{number}"
+                    for repo_id, number in self.dependency_cycle))
+            if len(self.critical_path) > 1:
+                print("\tcritical path: " + " -> ".join(
+                    f"{self.sheet_processor.tools.combo.repo(repo_id).full_name}#{number}"
+                    for repo_id, number in self.critical_path))
+
+        def _update_epic(self):
             print(self.epic)
             self.row_range['B', self.row_number] = self.epic.title
 
@@ -61,6 +137,7 @@ class SyncSpreadsheet:
                 print(f"\t\t{repo.full_name} = column {map_entry.column}")
             else:
                 map_entry = self.sheet_processor.repo_map.create_new(repo)
+                self.sheet_processor.keep_boards_of_every_repo()
                 print(f"\t\tassigning column {map_entry.column} to {repo.full_name}")
                 column_letter = self.sheet_processor.tools.column_number_to_letter(map_entry.column)
                 self.header_range[column_letter, 2] = repo.full_name
@@ -0,0 +1,102 @@
+import datetime
+import json
+import os
+import time
+
+
+class SyncState:
+    """
+    What we knew about a spreadsheet at the end of its last sync, stored locally
+    so the next sync can skip epics where nothing has changed:
+
+        last_sync  when the last complete sync started (seconds since the epoch)
+        repos      full names of every repo seen in the sheet
+        epics      epic number -> [[repo_id, issue_number], ...] of its linked issues
+    """
+
+    DEFAULT_DIRECTORY = os.path.join(os.path.expanduser("~"), ".zentool", "sync-state")
+    CLOCK_SKEW_ALLOWANCE = datetime.timedelta(minutes=5)
+
+    def __init__(self, spreadsheet_id, directory=None):
+        self.path = os.path.join(directory or self.DEFAULT_DIRECTORY, f"{spreadsheet_id}.json")
+        self.last_sync = None
+        self.repos = set()
+        self.epics = dict()
+        self.changed_issues = set()
+        self._sync_started = None
+        self._detect_changes = True
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path) as state_file:
+                data = json.load(state_file)
+            last_sync = data.get('last_sync')
+            repos = set(data.get('repos', []))
+            epics = {number: [tuple(key) for key in keys] for number, keys in data.get('epics', {}).items()}
+        except (OSError, ValueError, TypeError, AttributeError) as e:
+            print(f"Ignoring unreadable sync state {self.path} ({e}), so syncing every epic")
+            return
+        self.last_sync, self.repos, self.epics = last_sync, repos, epics
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        data = {
+            'last_sync': self.last_sync,
+            'repos': sorted(self.repos),
+            'epics': {number: [list(key) for key in keys] for number, keys in self.epics.items()},
+        }
+        with open(self.path, 'w') as state_file:
+            json.dump(data, state_file, indent=2)
+
+    def start_sync(self, combo, repo_names):
+        """
+        Ask GitHub which issues have changed in our repos since the last sync.
+        Issues in repos we have never seen are not covered, but they can only appear
+        through a change in an epic's list of linked issues, which is_unchanged() detects.
+        When working from a snapshot GitHub can't be asked, so every epic is treated as changed.
+        """
+        self._sync_started = time.time()
+        self.repos.update(repo_names)
+        if combo.snapshot:
+            print("Working from a snapshot, so syncing every epic")
+            self._detect_changes = False
+        if not self.last_sync or not self._detect_changes:
+            return
+        since = datetime.datetime.utcfromtimestamp(self.last_sync) - self.CLOCK_SKEW_ALLOWANCE
+        for repo_name in sorted(self.repos):
+            repo = combo.repo(repo_name)
+            for gh_issue in repo.git.get_issues(state='all', since=since):
+                self.changed_issues.add((repo.id, gh_issue.number))
+
+    def finish_sync(self, complete=True):
+        """
+        :param complete: False if only some epics were synced, in which case last_sync must not move forward
+        """
+        if complete and self._detect_changes:  # a snapshot's data may be older than this sync
+            self.last_sync = self._sync_started
+        self.save()
+
+    def is_unchanged(self, epic):
+        """
+        :return: True if neither the epic, its list of linked issues, nor any of those issues
+                 have changed since the last sync
+        """
+        if not self.last_sync or not self._detect_changes:
+            return False
+        issue_keys = self.epic_issue_keys(epic)
+        if self.epics.get(str(epic.number)) != issue_keys:
+            return False
+        if (epic.repo.id, int(epic.number)) in self.changed_issues:
+            return False
+        return not any(key in self.changed_issues for key in issue_keys)
+
+    def record_epic(self, epic, issues):
+        self.epics[str(epic.number)] = self.epic_issue_keys(epic)
+        self.repos.update(issue.repo.full_name for issue in issues)
+
+    @staticmethod
+    def epic_issue_keys(epic):
+        return sorted((issue_data['repo_id'], issue_data['issue_number']) for issue_data in epic.raw_issues())
@@ -0,0 +1,62 @@
+import collections
+
+from zentool.lib.google_sheet import GoogleSheet
+from zentool.lib.workspace import Workspace
+from . import output
+from .spreadsheet_processor import SpreadsheetProcessor
+from .spreadsheet_tools import SpreadsheetTools
+
+
+class WorkspaceCrawler:
+    """
+    usage: zentool -r <repo> workspace [<repo> ...]
+           zentool -r <repo> workspace --sheet <spreadsheet_id>
+
+    Crawl the boards, issues, epics and releases of the tracker repo and other repos, all at once,
+    and report the issues of each repo by state and pipeline.  With --sheet, the other repos are the ones
+    in the header row of that tracking spreadsheet.
+    """
+
+    @classmethod
+    def configure(cls, subparsers):
+        workspace_parser = subparsers.add_parser('workspace',
+                                                 description="Index and report on the issues of many repos")
+        workspace_parser.set_defaults(command='workspace')
+        workspace_parser.add_argument('repo_names', type=str, nargs='*', metavar='REPO',
+                                      help="other repos to include")
+        workspace_parser.add_argument('--sheet', type=str, metavar='SPREADSHEET_ID',
+                                      help="include every repo with a column in this tracking spreadsheet")
+
+    def __init__(self, combo):
+        self.combo = combo
+
+    def run(self, args):
+        repo_names = [args.repo_name] + args.repo_names
+        if args.sheet:
+            repo_names += self._repo_names_from_sheet(args.sheet)
+        repo_names = list(dict.fromkeys(repo_names))
+        output(f"Crawling {len(repo_names)} repos...")
+        workspace = Workspace(self.combo).crawl(repo_names)
+        print(f" {workspace}")
+        for repo in workspace.repos.values():
+            self._report_repo(workspace, repo)
+
+    @staticmethod
+    def _repo_names_from_sheet(spreadsheet_id):
+        SpreadsheetTools.check_google_auth_is_configured()
+        cells = GoogleSheet(spreadsheet_id).get_cells(SpreadsheetProcessor.REPO_HEADING_RANGE)
+        return [repo_name for repo_name in (cells[0] if cells else [])
+                if repo_name and repo_name != SpreadsheetProcessor.BLOCKED_HEADING]
+
+    @staticmethod
+    def _report_repo(workspace, repo):
+        issues = workspace.issues(repo_id=repo.id)
+        states = collections.Counter(entry.state for key, entry in issues)
+        print(f"{repo.full_name}: {states['open']} open, {states['closed']} closed, "
+              f"{sum(1 for key in workspace.epics if key[0] == repo.id)} epics")
+        counts = collections.Counter(entry.pipeline for key, entry in issues)
+        estimates = collections.Counter()
+        for key, entry in issues:
+            estimates[entry.pipeline] += entry.estimate or 0
+        for pipeline in workspace.pipelines[repo.id]:
+            print(f"\t{pipeline}: {counts[pipeline]} issues, estimate {estimates[pipeline]}")